@@ -1,5 +1,4 @@
 """Add audio transcription to already-processed videos."""
-import json
 import asyncio
 from pathlib import Path
 
@@ -8,51 +7,73 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.services.audio_transcriber import get_audio_transcriber, WHISPER_AVAILABLE
-from app.services.nim_client import NIMClientFactory
+from app.services.nim_client import NIMClientFactory, embed_isolating_failures
 from app.services.vector_store import VectorStore
+from app.services.video_processor import VideoLibrary, resolve_video_path
 from app.config import config
 
 VIDEOS_DIR = Path("./data/videos")
-METADATA_FILE = VIDEOS_DIR / "videos_metadata.json"
 
+# Texts per embedding request, and max in-flight embedding requests across all videos
+EMBED_BATCH_SIZE = 64
+EMBED_CONCURRENCY = 4
 
-async def transcribe_video(video_id: str, video_path: str, vector_store: VectorStore, embedding_client):
-    """Add audio transcription to a video."""
-    print(f"\n📢 Transcribing audio for: {video_id}")
+
+async def transcribe_video(
+    video_id: str,
+    video_path: str,
+    embedding_client,
+    whisper_sem: asyncio.Semaphore,
+    embed_sem: asyncio.Semaphore
+) -> list:
+    """Transcribe and embed a video's audio; returns description dicts ready for insert."""
+    # Whisper stage: the GPU model is the bottleneck, so keep this narrow
+    async with whisper_sem:
+        print(f"\n📢 Transcribing audio for: {video_id}")
+        transcriber = get_audio_transcriber()
+        segments = await asyncio.to_thread(
+            transcriber.transcribe_segments, video_path, segment_duration=10.0
+        )
     
-    transcriber = get_audio_transcriber()
-    segments = transcriber.transcribe_segments(video_path, segment_duration=10.0)
+    # Drop empty segments up front (isspace doesn't allocate like strip)
+    segments = [s for s in segments if s.text and not s.text.isspace()]
     
     if not segments:
         print(f"  ⚠️ No audio segments found")
-        return 0
+        return []
     
-    print(f"  Found {len(segments)} audio segments")
+    print(f"  Found {len(segments)} audio segments in {video_id}")
     
-    # Embed and store
-    audio_descriptions = []
-    for seg in segments:
-        if not seg.text.strip():
-            continue
-        
-        description = f"[AUDIO] {seg.text}"
-        
-        try:
-            embed_response = embedding_client.embed_text(description)
-            audio_descriptions.append({
-                "timestamp": seg.start,
-                "description": description,
-                "embedding": embed_response.embedding
-            })
-        except Exception as e:
-            print(f"  ⚠️ Embedding error: {e}")
-            continue
+    # Embedding stage: one request per batch, overlaps with the next video's transcription
+    texts = [(seg.start, f"[AUDIO] {seg.text}") for seg in segments]
+    batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    
+    async def embed_batch(batch):
+        async with embed_sem:
+            return await asyncio.to_thread(
+                embed_isolating_failures, embedding_client, [d for _, d in batch]
+            )
     
-    if audio_descriptions:
-        vector_store.insert_descriptions(video_id, audio_descriptions)
-        print(f"  ✅ Added {len(audio_descriptions)} audio segments")
+    # gather preserves batch order
+    responses = await asyncio.gather(*(embed_batch(b) for b in batches))
     
-    return len(audio_descriptions)
+    audio_descriptions = [
+        {
+            "timestamp": start,
+            "description": description,
+            "embedding": embed_response.embedding
+        }
+        for batch, batch_responses in zip(batches, responses)
+        for (start, description), embed_response in zip(batch, batch_responses)
+        if embed_response is not None
+    ]
+    
+    dropped = len(texts) - len(audio_descriptions)
+    if dropped:
+        print(f"  ⚠️ Dropped {dropped} audio segments that failed to embed")
+    
+    print(f"  ✅ Embedded {len(audio_descriptions)} audio segments for {video_id}")
+    return audio_descriptions
 
 
 async def main():
@@ -60,16 +81,14 @@ async def main():
         print("❌ faster-whisper not installed. Run: pip install faster-whisper")
         return
     
-    # Load metadata
-    if not METADATA_FILE.exists():
+    # Load library metadata
+    library = VideoLibrary(str(VIDEOS_DIR))
+    if not library.videos:
         print("❌ No videos metadata found")
         return
     
-    with open(METADATA_FILE) as f:
-        metadata = json.load(f)
-    
     # Filter completed videos
-    completed = [(vid, info) for vid, info in metadata.items() 
+    completed = [(vid, info) for vid, info in library.videos.items()
                  if info.get("status") == "completed"]
     
     if not completed:
@@ -80,8 +99,8 @@ async def main():
     
     # Initialize services - use same config as main app
     if config.video.use_local_embedding:
-        from app.services.local_embedding import LocalEmbeddingClient
-        embedding_client = LocalEmbeddingClient()
+        from app.services.local_embedding import get_local_embedding_client
+        embedding_client = get_local_embedding_client()
         print("Using LOCAL embeddings (384-dim)")
     else:
         embedding_client = NIMClientFactory.create_embedding_client(config)
@@ -90,35 +109,43 @@ async def main():
     vector_store = VectorStore(
         db_path=config.milvus.db_path,
         collection_name=config.milvus.collection_name,
-        embedding_dim=config.milvus.embedding_dim
+        embedding_dim=config.milvus.embedding_dim,
+        vector_dtype=config.milvus.vector_dtype,
+        index_type=config.milvus.index_type,
+        index_params=config.milvus.index_params,
+        search_params=config.milvus.search_params
     )
     
-    total_segments = 0
+    jobs = []
     for video_id, info in completed:
         path = info.get("path")
         if not path:
             print(f"⚠️ No path for: {video_id}")
             continue
         
-        # Handle Docker path mapping
-        video_path = Path(path)
-        if not video_path.exists():
-            # Try /workspace prefix (Docker mount)
-            alt_path = Path("/workspace/data/videos") / video_path.name
-            if alt_path.exists():
-                video_path = alt_path
-            else:
-                # Try relative to current dir
-                alt_path = VIDEOS_DIR / video_path.name
-                if alt_path.exists():
-                    video_path = alt_path
-                else:
-                    print(f"⚠️ Video file not found: {video_id} ({path})")
-                    continue
+        # Handle Docker path mapping: recorded path, then /workspace mount, then local dir
+        video_path = resolve_video_path(path, VIDEOS_DIR)
+        if video_path is None:
+            print(f"⚠️ Video file not found: {video_id} ({path})")
+            continue
         
-        count = await transcribe_video(video_id, str(video_path), vector_store, embedding_client)
-        total_segments += count
+        jobs.append((video_id, str(video_path)))
+    
+    # Videos run concurrently; the semaphores bound each stage separately
+    whisper_sem = asyncio.Semaphore(config.processing.whisper_concurrency or 1)
+    embed_sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+    results = await asyncio.gather(*(
+        transcribe_video(video_id, video_path, embedding_client, whisper_sem, embed_sem)
+        for video_id, video_path in jobs
+    ))
     
+    # Rows are inserted in one bulk pass after all videos are transcribed
+    all_rows = [
+        (video_id, d)
+        for (video_id, _), descriptions in zip(jobs, results)
+        for d in descriptions
+    ]
+    total_segments = vector_store.bulk_insert(all_rows)
     print(f"\n✅ Done! Added {total_segments} total audio segments")
 
 
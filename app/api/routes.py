@@ -2,153 +2,253 @@
 import os
 import uuid
 import asyncio
+import hashlib
+import time
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 import logging
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException, Request, Query
+from fastapi.responses import JSONResponse, FileResponse, Response, ORJSONResponse, StreamingResponse
+import aiofiles
+import numpy as np
 
 from ..models.schemas import (
     VideoInfo, VideoUploadResponse, VideoListResponse,
     ProcessingProgress, ProcessingStatus, QuestionRequest, AnswerResponse,
     GlobalSearchRequest, GlobalSearchResponse, GlobalSearchResult,
-    DetectionRequest, DetectionResponse, DetectedObject,
-    SegmentRequest, SegmentResponse
+    DetectionRequest, DetectionBatchRequest, DetectionResponse, DetectedObject,
+    SegmentRequest, SegmentResponse,
+    VideoInfoList, GlobalSearchResultList, ProgressAdapter, DetectionResponseList
 )
 from ..config import config
-from ..services.video_processor import VideoProcessor, VideoLibrary
+from ..services.video_processor import VideoProcessor, VideoLibrary, resolve_video_path
 from ..services.vector_store import VectorStore
-from ..services.nim_client import VLMClient, EmbeddingClient, LLMClient, NIMClientFactory
+from ..services.nim_client import VLMClient, EmbeddingClient, LLMClient, NIMClientFactory, get_shared_session
 from ..services.qa_service import VideoQAService
+from ..services.embedding_cache import EmbeddingCache, DiskEmbeddingCache
+from ..services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# orjson renders JSON bodies several times faster than stdlib json
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# Service instances (initialized lazily)
+# Upload stream buffer size (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Read size for ranged video responses (256 KiB keeps per-viewer buffers small)
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Process pool for CPU-bound OpenCV work (metadata probe, thumbnail) during upload.
+# Spawned workers only import video_processor, not the loaded models.
+_media_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_media_pool() -> ProcessPoolExecutor:
+    """Get or create the media process pool."""
+    global _media_pool
+    if _media_pool is None:
+        _media_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _media_pool
+
+# Service instances (preloaded at startup, or initialized lazily).
+# Sync handlers run in threads, so creation is guarded by double-checked locks.
 _qa_service: Optional[VideoQAService] = None
 _video_library: Optional[VideoLibrary] = None
+_qa_service_lock = threading.Lock()
+_video_library_lock = threading.Lock()
 
 
 def get_video_library() -> VideoLibrary:
     """Get or create video library instance."""
     global _video_library
     if _video_library is None:
-        _video_library = VideoLibrary(str(config.videos_dir))
+        with _video_library_lock:
+            if _video_library is None:
+                _video_library = VideoLibrary(str(config.videos_dir))
     return _video_library
 
 
 def get_qa_service() -> VideoQAService:
     """Get or create QA service instance."""
     global _qa_service
-    if _qa_service is None:
-        # Choose VLM client based on config
-        if config.video.use_local_vlm:
-            from ..services.local_vlm import LocalVLMClient
-            vlm_client = LocalVLMClient()
-            logger.info("Using LOCAL GPU VLM (LLaVA)")
-        else:
-            vlm_client = NIMClientFactory.create_vlm_client(config)
-            logger.info("Using CLOUD VLM (NIM API)")
-        
-        # Choose embedding client based on config
-        if config.video.use_local_embedding:
-            from ..services.local_embedding import LocalEmbeddingClient
-            embedding_client = LocalEmbeddingClient()
-            logger.info("Using LOCAL GPU Embeddings (sentence-transformers)")
-        else:
-            embedding_client = NIMClientFactory.create_embedding_client(config)
-            logger.info("Using CLOUD Embeddings (NIM API)")
-        llm_client = NIMClientFactory.create_llm_client(config)
-        vector_store = VectorStore(
-            db_path=config.milvus.db_path,
-            collection_name=config.milvus.collection_name,
-            embedding_dim=config.milvus.embedding_dim
-        )
-        video_processor = VideoProcessor(sample_interval=config.video.frame_sample_interval)
-        
-        _qa_service = VideoQAService(
-            vlm_client=vlm_client,
-            embedding_client=embedding_client,
-            llm_client=llm_client,
-            vector_store=vector_store,
-            video_processor=video_processor,
-            video_library=get_video_library()
-        )
+    if _qa_service is not None:
+        return _qa_service
+    
+    with _qa_service_lock:
+        if _qa_service is None:
+            _qa_service = _create_qa_service()
     return _qa_service
 
 
+def _create_qa_service() -> VideoQAService:
+    """Build the QA service and its clients."""
+    # Choose VLM client based on config
+    if config.video.use_local_vlm:
+        from ..services.local_vlm import get_local_vlm
+        vlm_client = get_local_vlm()
+        logger.info("Using LOCAL GPU VLM (LLaVA)")
+    else:
+        vlm_client = NIMClientFactory.create_vlm_client(config, session=get_shared_session())
+        logger.info("Using CLOUD VLM (NIM API)")
+    
+    # Choose embedding client based on config
+    if config.video.use_local_embedding:
+        from ..services.local_embedding import get_local_embedding_client
+        embedding_client = get_local_embedding_client()
+        logger.info("Using LOCAL GPU Embeddings (sentence-transformers)")
+    else:
+        embedding_client = NIMClientFactory.create_embedding_client(config, session=get_shared_session())
+        logger.info("Using CLOUD Embeddings (NIM API)")
+    llm_client = NIMClientFactory.create_llm_client(config, session=get_shared_session())
+    vector_store = VectorStore(
+        db_path=config.milvus.db_path,
+        collection_name=config.milvus.collection_name,
+        embedding_dim=config.milvus.embedding_dim,
+        vector_dtype=config.milvus.vector_dtype,
+        index_type=config.milvus.index_type,
+        index_params=config.milvus.index_params,
+        search_params=config.milvus.search_params
+    )
+    video_processor = VideoProcessor(sample_interval=config.video.frame_sample_interval)
+    
+    return VideoQAService(
+        vlm_client=vlm_client,
+        embedding_client=embedding_client,
+        llm_client=llm_client,
+        vector_store=vector_store,
+        video_processor=video_processor,
+        video_library=get_video_library(),
+        embedding_cache=(
+            DiskEmbeddingCache(os.path.join(config.milvus.embedding_cache_dir, "query_embeddings.npy"))
+            if config.milvus.embedding_cache_dir
+            else EmbeddingCache(maxsize=config.milvus.embedding_cache_size, ttl=3600)
+        ),
+        semantic_cache=SemanticCache(
+            maxsize=config.milvus.semantic_cache_size,
+            tau=config.milvus.semantic_cache_tau
+        ),
+        embed_batch_size=config.video.max_frames_per_batch,
+        vlm_batch_size=config.video.vlm_batch_size,
+        vlm_batch_max=config.video.vlm_batch_max
+    )
+
+
+def _to_video_info(v: Dict[str, Any]) -> VideoInfo:
+    """Build a VideoInfo response model from a library entry (trusted, so unvalidated)."""
+    return VideoInfo.model_construct(
+        id=v.get("id", ""),
+        name=v.get("name", v.get("filename", "")),
+        filename=v.get("filename", ""),
+        duration=v.get("duration"),
+        frame_count=v.get("total_frames"),
+        processed_frames=v.get("processed_frames", 0),
+        status=ProcessingStatus(v.get("status", "pending")),
+        thumbnail_url=f"/api/videos/{v.get('id')}/thumbnail" if v.get("thumbnail") else None
+    )
+
+
 @router.get("/api/videos", response_model=VideoListResponse)
-async def list_videos():
-    """List all available videos."""
+async def list_videos(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000)
+):
+    """List available videos, optionally one page at a time (no limit returns all)."""
     library = get_video_library()
-    videos = library.list_videos()
-    
-    video_infos = []
-    for v in videos:
-        video_infos.append(VideoInfo(
-            id=v.get("id", ""),
-            name=v.get("name", v.get("filename", "")),
-            filename=v.get("filename", ""),
-            duration=v.get("duration"),
-            frame_count=v.get("total_frames"),
-            processed_frames=v.get("processed_frames", 0),
-            status=ProcessingStatus(v.get("status", "pending")),
-            thumbnail_url=f"/api/videos/{v.get('id')}/thumbnail" if v.get("thumbnail") else None
-        ))
+    # Off the event loop: a stale cache reloads from SQLite
+    videos = await asyncio.to_thread(library.list_videos)  # Cached list, so len() is O(1)
+    page = videos[offset:offset + limit] if limit is not None else videos[offset:]
+    video_infos = [_to_video_info(v) for v in page]
     
-    return VideoListResponse(videos=video_infos, total=len(video_infos))
+    # Return the response directly so FastAPI doesn't re-validate every VideoInfo;
+    # the whole page is dumped in one TypeAdapter call
+    return ORJSONResponse({
+        "videos": VideoInfoList.dump_python(video_infos, mode="json"),
+        "total": len(videos)
+    })
 
 
 @router.post("/api/videos/upload", response_model=VideoUploadResponse)
 async def upload_video(file: UploadFile = File(...)):
     """Upload a new video file."""
+    # Split the client filename once
+    original = Path(file.filename)
+    stem = original.stem
+    ext = original.suffix.lower()
+    
     # Validate file extension
-    ext = Path(file.filename).suffix.lower()
     if ext not in config.video.supported_formats:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported format. Allowed: {config.video.supported_formats}"
         )
     
+    # Reject oversized uploads up front when the client sent a size
+    max_bytes = config.video.max_upload_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large. Max {max_bytes} bytes")
+    
     # Generate unique ID and filename
     video_id = str(uuid.uuid4())[:8]
-    safe_filename = f"{video_id}_{Path(file.filename).stem}{ext}"
+    safe_filename = f"{video_id}_{stem}{ext}"
     file_path = config.videos_dir / safe_filename
+    file_path_str = str(file_path)
     
     try:
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stream to disk in chunks, hashing in the same pass
+        sha256 = hashlib.sha256()
+        written = 0
+        async with aiofiles.open(file_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File too large. Max {max_bytes} bytes")
+                sha256.update(chunk)
+                await out.write(chunk)
+        content_hash = sha256.hexdigest()
         
-        # Get video metadata
-        processor = VideoProcessor()
-        metadata = processor.get_metadata(str(file_path))
+        # Reuse the existing entry if this exact file was uploaded before
+        library = get_video_library()
+        # Library calls hit SQLite; keep them off the event loop
+        existing = await asyncio.to_thread(library.find_by_hash, content_hash)
+        if existing:
+            logger.info(f"Duplicate upload of video {existing['id']}, discarding new copy")
+            file_path.unlink()
+            return VideoUploadResponse(success=True, video=_to_video_info(existing))
         
-        # Generate thumbnail
-        thumbnail_path = config.videos_dir / f"{video_id}_thumb.jpg"
-        processor.generate_thumbnail(str(file_path), str(thumbnail_path))
+        # Get video metadata and thumbnail in one open of the file, off the event loop
+        processor = VideoProcessor()
+        thumbnail_path = str(config.videos_dir / f"{video_id}_thumb.jpg")
+        metadata = await asyncio.get_running_loop().run_in_executor(
+            get_media_pool(), processor.analyze, file_path_str, thumbnail_path
+        )
         
         # Add to library
-        library = get_video_library()
-        video_info = library.add_video(video_id, safe_filename, {
-            "name": Path(file.filename).stem,
+        video_info = await asyncio.to_thread(library.add_video, video_id, safe_filename, {
+            "sha256": content_hash,
+            "name": stem,
             "duration": metadata.duration,
             "fps": metadata.fps,
             "width": metadata.width,
             "height": metadata.height,
             "total_frames": metadata.total_frames,
-            "thumbnail": str(thumbnail_path)
+            "thumbnail": thumbnail_path
         })
         
         return VideoUploadResponse(
             success=True,
             video=VideoInfo(
                 id=video_id,
-                name=Path(file.filename).stem,
+                name=stem,
                 filename=safe_filename,
                 duration=metadata.duration,
                 frame_count=metadata.total_frames,
@@ -156,6 +256,10 @@ async def upload_video(file: UploadFile = File(...)):
                 thumbnail_url=f"/api/videos/{video_id}/thumbnail"
             )
         )
+    except HTTPException:
+        if file_path.exists():
+            file_path.unlink()
+        raise
     except Exception as e:
         logger.error(f"Error uploading video: {e}")
         # Cleanup on failure
@@ -165,7 +269,7 @@ async def upload_video(file: UploadFile = File(...)):
 
 
 @router.get("/api/videos/{video_id}")
-async def get_video(video_id: str):
+def get_video(video_id: str):
     """Get video info by ID."""
     library = get_video_library()
     video = library.get_video(video_id)
@@ -173,40 +277,115 @@ async def get_video(video_id: str):
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return VideoInfo(
-        id=video.get("id", ""),
-        name=video.get("name", video.get("filename", "")),
-        filename=video.get("filename", ""),
-        duration=video.get("duration"),
-        frame_count=video.get("total_frames"),
-        processed_frames=video.get("processed_frames", 0),
-        status=ProcessingStatus(video.get("status", "pending")),
-        thumbnail_url=f"/api/videos/{video_id}/thumbnail" if video.get("thumbnail") else None
-    )
+    return _to_video_info(video)
+
+
+def _parse_range(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" header.
+    
+    Args:
+        range_header: Value of the Range request header
+        file_size: Size of the file in bytes
+        
+    Returns:
+        Inclusive (start, end) byte positions, or None if the header is not a
+        single byte range (the full file is served instead)
+        
+    Raises:
+        HTTPException: 416 if the range can't be satisfied
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # Suffix range: last N bytes
+            start = max(file_size - int(end_str), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, min(end, file_size - 1)
+
+
+async def range_stream(path: str, start: int, end: int):
+    """Yield bytes start..end (inclusive) of a file in STREAM_CHUNK_SIZE reads."""
+    remaining = end - start + 1
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 @router.get("/api/videos/{video_id}/stream")
-async def stream_video(video_id: str):
-    """Stream video file."""
+def stream_video(video_id: str, request: Request):
+    """Stream video file (206 partial content for Range requests, so seeking is instant)."""
     library = get_video_library()
     video = library.get_video(video_id)
     
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    file_path = Path(video.get("path", ""))
-    if not file_path.exists():
+    file_path = resolve_video_path(video.get("path", ""), config.videos_dir)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Video file not found")
+    
+    # One stat serves both the existence check and the response headers
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
         raise HTTPException(status_code=404, detail="Video file not found")
     
+    # Seeks: serve only the requested bytes
+    range_header = request.headers.get("range")
+    byte_range = _parse_range(range_header, stat_result.st_size) if range_header else None
+    if byte_range is not None:
+        start, end = byte_range
+        return StreamingResponse(
+            range_stream(str(file_path), start, end),
+            status_code=206,
+            media_type="video/mp4",
+            headers={
+                "Content-Range": f"bytes {start}-{end}/{stat_result.st_size}",
+                "Accept-Ranges": "bytes",
+                "Content-Length": str(end - start + 1)
+            }
+        )
+    
+    # Full file: FileResponse uses sendfile and advertises Accept-Ranges
     return FileResponse(
         str(file_path),
         media_type="video/mp4",
-        filename=video.get("filename", "video.mp4")
+        filename=video.get("filename", "video.mp4"),
+        stat_result=stat_result
     )
 
 
+@functools.lru_cache(maxsize=512)
+def _load_thumbnail_bytes(path: str, mtime_ns: int) -> bytes:
+    """Read a thumbnail; mtime is part of the cache key so rewrites invalidate it."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
 @router.get("/api/videos/{video_id}/thumbnail")
-async def get_thumbnail(video_id: str):
+def get_thumbnail(video_id: str):
     """Get video thumbnail."""
     library = get_video_library()
     video = library.get_video(video_id)
@@ -214,72 +393,154 @@ async def get_thumbnail(video_id: str):
     if not video or not video.get("thumbnail"):
         raise HTTPException(status_code=404, detail="Thumbnail not found")
     
-    thumbnail_path = Path(video.get("thumbnail", ""))
-    if not thumbnail_path.exists():
+    thumbnail_path = video.get("thumbnail", "")
+    try:
+        mtime_ns = os.stat(thumbnail_path).st_mtime_ns
+    except OSError:
         raise HTTPException(status_code=404, detail="Thumbnail file not found")
     
-    return FileResponse(str(thumbnail_path), media_type="image/jpeg")
+    return Response(
+        content=_load_thumbnail_bytes(thumbnail_path, mtime_ns),
+        media_type="image/jpeg",
+        headers={
+            "Cache-Control": "public, max-age=86400",
+            "ETag": f'"{video_id}-{mtime_ns}"'
+        }
+    )
+
+
+# Background processing queue, drained by a fixed pool of workers
+_processing_queue: Optional[asyncio.Queue] = None
+_processing_workers: List[asyncio.Task] = []
+# Videos queued or running (touched only on the event loop), and the running tasks
+_active_videos: Set[str] = set()
+_running_tasks: Dict[str, asyncio.Task] = {}
 
 
-@router.post("/api/videos/{video_id}/process")
-async def start_processing(video_id: str, background_tasks: BackgroundTasks):
-    """Start processing a video."""
+async def _processing_worker(queue: asyncio.Queue):
+    """Process queued videos one at a time, sharing the QA service singleton."""
+    while True:
+        video_id = await queue.get()
+        if video_id not in _active_videos:
+            # Stopped while still queued
+            queue.task_done()
+            continue
+        try:
+            qa_service = get_qa_service()
+            
+            def progress_callback(progress: ProcessingProgress):
+                # Send progress to connected WebSocket clients
+                broadcast_progress(video_id, progress)
+            
+            task = asyncio.create_task(qa_service.process_video(video_id, progress_callback))
+            _running_tasks[video_id] = task
+            await task
+        except asyncio.CancelledError:
+            if video_id in _active_videos:
+                # The worker itself is being cancelled (shutdown), not just this video
+                raise
+            logger.info(f"Processing of {video_id} was stopped")
+        except Exception as e:
+            logger.error(f"Processing worker failed on {video_id}: {e}")
+        finally:
+            _running_tasks.pop(video_id, None)
+            if video_id in _active_videos:
+                _active_videos.discard(video_id)
+                # Release the claim if processing never reached a final status
+                # (service setup failed, early return, or cancelled at shutdown)
+                await asyncio.to_thread(_release_claim, video_id)
+            queue.task_done()
+
+
+def _release_claim(video_id: str):
+    """Mark a video still "processing" as failed."""
+    library = get_video_library()
+    if library.get_status(video_id) == "processing":
+        library.update_video(video_id, {"status": "failed"})
+
+
+def get_processing_queue() -> asyncio.Queue:
+    """Get the processing queue, starting the worker pool on first use."""
+    global _processing_queue
+    if _processing_queue is None:
+        _processing_queue = asyncio.Queue()
+        for _ in range(config.processing.max_concurrent):
+            _processing_workers.append(asyncio.create_task(_processing_worker(_processing_queue)))
+        logger.info(f"Started {config.processing.max_concurrent} processing workers")
+    return _processing_queue
+
+
+@router.post("/api/videos/{video_id}/process", status_code=202)
+async def start_processing(video_id: str):
+    """Start processing a video (accepted and queued, 202)."""
     library = get_video_library()
-    video = library.get_video(video_id)
-    
-    if not video:
-        raise HTTPException(status_code=404, detail="Video not found")
     
-    if video.get("status") == "processing":
+    # A stopped video may still have its pipeline winding down
+    if video_id in _active_videos or video_id in _running_tasks:
         raise HTTPException(status_code=400, detail="Video is already being processed")
     
-    # Start processing in background
-    async def process_with_updates():
-        qa_service = get_qa_service()
-        
-        def progress_callback(progress: ProcessingProgress):
-            # Send progress to connected WebSocket clients
-            asyncio.create_task(broadcast_progress(video_id, progress))
-        
-        await qa_service.process_video(video_id, progress_callback)
+    # Check-and-set in one step so concurrent POSTs can't queue the same video twice
+    try:
+        claimed = await asyncio.to_thread(library.claim_for_processing, video_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not claimed:
+        raise HTTPException(status_code=400, detail="Video is already being processed")
     
-    background_tasks.add_task(process_with_updates)
+    # Queue for the worker pool and return immediately
+    _active_videos.add(video_id)
+    get_processing_queue().put_nowait(video_id)
     
     return {"message": "Processing started", "video_id": video_id}
 
 
-@router.get("/api/videos/{video_id}/status")
-async def get_processing_status(video_id: str):
-    """Get processing status for a video."""
+@router.get("/api/videos/{video_id}/status", response_model=ProcessingProgress)
+def get_processing_status(video_id: str, request: Request):
+    """Get processing status for a video (304 when unchanged since the client's ETag)."""
     qa_service = get_qa_service()
     status = qa_service.get_processing_status(video_id)
     
     if not status:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return status
+    # Polls only pay for a body when the status or progress actually changed
+    etag = f'W/"{status.status.value}-{status.current_frame}-{status.total_frames}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return Response(
+        content=ProgressAdapter.dump_json(status),
+        media_type="application/json",
+        headers=headers
+    )
 
 
 @router.post("/api/videos/{video_id}/stop")
 async def stop_processing(video_id: str):
     """Stop processing a video and reset its status."""
     library = get_video_library()
-    video = library.get_video(video_id)
     
-    if not video:
+    if not await asyncio.to_thread(library.has_video, video_id):
         raise HTTPException(status_code=404, detail="Video not found")
     
-    # Reset status to pending (or failed if it was processing)
-    current_status = video.get("status", "pending")
-    if current_status == "processing":
-        library.update_video(video_id, {"status": "pending"})
+    # Drop it from the queue (or cancel its running pipeline) before resetting the
+    # status, so a new POST can't start a second pipeline alongside the old one
+    _active_videos.discard(video_id)
+    task = _running_tasks.get(video_id)
+    if task is not None:
+        task.cancel()
+    
+    # Reset status to pending
+    if await asyncio.to_thread(library.get_status, video_id) == "processing":
+        await asyncio.to_thread(library.update_video, video_id, {"status": "pending"})
         logger.info(f"Stopped processing video {video_id}, reset to pending")
     
     return {"message": "Processing stopped", "video_id": video_id}
 
 
 @router.post("/api/videos/{video_id}/ask", response_model=AnswerResponse)
-async def ask_question(video_id: str, request: QuestionRequest):
+def ask_question(video_id: str, request: QuestionRequest):
     """Ask a question about a video."""
     library = get_video_library()
     video = library.get_video(video_id)
@@ -296,11 +557,12 @@ async def ask_question(video_id: str, request: QuestionRequest):
     qa_service = get_qa_service()
     answer = qa_service.ask_question(video_id, request.question)
     
-    return answer
+    # Return the response directly so FastAPI doesn't re-validate the sources
+    return ORJSONResponse(answer.model_dump(mode="json"))
 
 
 @router.delete("/api/videos/{video_id}")
-async def delete_video(video_id: str):
+def delete_video(video_id: str):
     """Delete a video and its data."""
     library = get_video_library()
     video = library.get_video(video_id)
@@ -311,6 +573,7 @@ async def delete_video(video_id: str):
     # Delete vector data
     qa_service = get_qa_service()
     qa_service.vector_store.delete_video_descriptions(video_id)
+    qa_service.invalidate_search_cache()
     
     # Delete thumbnail
     if video.get("thumbnail"):
@@ -325,7 +588,7 @@ async def delete_video(video_id: str):
 
 
 @router.post("/api/search", response_model=GlobalSearchResponse)
-async def global_search(request: GlobalSearchRequest):
+def global_search(request: GlobalSearchRequest):
     """
     Search across ALL videos in the database.
     
@@ -339,104 +602,154 @@ async def global_search(request: GlobalSearchRequest):
         generate_answer=True
     )
     
-    # Convert to response model
-    search_results = [
-        GlobalSearchResult(
-            video_id=r["video_id"],
-            video_name=r["video_name"],
-            timestamp=r["timestamp"],
-            description=r["description"],
-            relevance_score=r["relevance_score"],
-            thumbnail_url=r["thumbnail_url"]
-        )
-        for r in result["results"]
-    ]
-    
+    # Convert to response model (the result dicts are validated in one batch)
     return GlobalSearchResponse(
         query=result["query"],
-        results=search_results,
+        results=GlobalSearchResultList.validate_python(result["results"]),
         total_results=result["total_results"],
         answer=result.get("answer")
     )
 
 
 # WebSocket for real-time progress updates
-# Store multiple connections per video (in case of reconnects)
-active_connections: Dict[str, List[WebSocket]] = {}
+# Each connection gets a bounded outbound queue drained by a single sender task,
+# so sends never race and a slow client only drops its own oldest updates.
+# Store multiple connections per video (in case of reconnects).
+# Keepalive is handled by uvicorn's protocol-level ping (--ws-ping-interval).
+PROGRESS_QUEUE_SIZE = 32
+active_connections: Dict[str, Set[asyncio.Queue]] = {}
+
+
+def _enqueue(queue: asyncio.Queue, message: str):
+    """Queue a message, dropping the oldest one if the queue is full."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+async def _progress_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """Send queued messages to a WebSocket in order; exits when the socket dies."""
+    try:
+        while True:
+            message = await queue.get()
+            await websocket.send_text(message)
+    except Exception as e:
+        logger.debug(f"WebSocket send failed: {e}")
+
 
 @router.websocket("/ws/progress/{video_id}")
 async def websocket_progress(websocket: WebSocket, video_id: str):
     """WebSocket endpoint for real-time processing progress."""
     await websocket.accept()
     
-    # Add to active connections list for this video
-    if video_id not in active_connections:
-        active_connections[video_id] = []
-    active_connections[video_id].append(websocket)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PROGRESS_QUEUE_SIZE)
+    sender = asyncio.create_task(_progress_sender(websocket, queue))
+    
+    # Add to active connections for this video
+    active_connections.setdefault(video_id, set()).add(queue)
     
     try:
         while True:
-            try:
-                # Use receive with timeout to detect disconnects faster
-                # Also handles ping/pong automatically
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                # Client can send "ping" to keep alive
-                if data == "ping":
-                    await websocket.send_text("pong")
-            except asyncio.TimeoutError:
-                # Send ping to check if client is alive
-                try:
-                    await websocket.send_text("ping")
-                except Exception:
-                    break
+            data = await websocket.receive_text()
+            # Client can send "ping" to keep alive
+            if data == "ping":
+                _enqueue(queue, "pong")
     except WebSocketDisconnect:
         pass
     except Exception as e:
         logger.debug(f"WebSocket error for {video_id}: {e}")
     finally:
+        sender.cancel()
         # Remove from active connections
-        if video_id in active_connections and websocket in active_connections[video_id]:
-            active_connections[video_id].remove(websocket)
-            if not active_connections[video_id]:
+        queues = active_connections.get(video_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
                 del active_connections[video_id]
 
 
-async def broadcast_progress(video_id: str, progress: ProcessingProgress):
-    """Broadcast progress update to all connected WebSocket clients for a video."""
-    if video_id not in active_connections:
+# Progress is coalesced per video to at most one message per interval;
+# the latest update wins and identical consecutive payloads are skipped.
+PROGRESS_MIN_INTERVAL = 0.1  # seconds (10 Hz)
+_last_sent_at: Dict[str, float] = {}
+_last_message: Dict[str, str] = {}
+_pending_progress: Dict[str, ProcessingProgress] = {}
+_flush_handles: Dict[str, asyncio.TimerHandle] = {}
+
+
+def _send_progress(video_id: str, progress: ProcessingProgress):
+    """Serialize a progress update once and queue it for every client of a video."""
+    # Text frame - the frontend JSON.parses it
+    message = ProgressAdapter.dump_json(progress).decode()
+    if message == _last_message.get(video_id):
         return
+    _last_message[video_id] = message
+    _last_sent_at[video_id] = time.monotonic()
     
-    # Send to all connected clients
-    dead_connections = []
-    for ws in active_connections[video_id]:
-        try:
-            await ws.send_json(progress.model_dump())
-        except Exception:
-            dead_connections.append(ws)
+    for queue in active_connections.get(video_id, ()):
+        _enqueue(queue, message)
+    
+    # Terminal states end the stream; drop per-video state
+    if progress.status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+        _last_sent_at.pop(video_id, None)
+        _last_message.pop(video_id, None)
+
+
+def _flush_progress(video_id: str):
+    """Send the latest coalesced update for a video."""
+    _flush_handles.pop(video_id, None)
+    progress = _pending_progress.pop(video_id, None)
+    if progress is not None:
+        _send_progress(video_id, progress)
+
+
+def broadcast_progress(video_id: str, progress: ProcessingProgress):
+    """Queue a progress update for all connected WebSocket clients of a video (<= 10 Hz)."""
+    if not active_connections.get(video_id):
+        return
     
-    # Clean up dead connections
-    for ws in dead_connections:
-        if ws in active_connections[video_id]:
-            active_connections[video_id].remove(ws)
+    # Final updates go out immediately, replacing anything still pending
+    if progress.status in (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED):
+        handle = _flush_handles.pop(video_id, None)
+        if handle:
+            handle.cancel()
+        _pending_progress.pop(video_id, None)
+        _send_progress(video_id, progress)
+        return
+    
+    elapsed = time.monotonic() - _last_sent_at.get(video_id, 0.0)
+    if elapsed >= PROGRESS_MIN_INTERVAL and video_id not in _flush_handles:
+        _send_progress(video_id, progress)
+        return
     
-    if video_id in active_connections and not active_connections[video_id]:
-        del active_connections[video_id]
+    # Too soon: keep only the latest update and flush it when the interval ends
+    _pending_progress[video_id] = progress
+    if video_id not in _flush_handles:
+        _flush_handles[video_id] = asyncio.get_running_loop().call_later(
+            PROGRESS_MIN_INTERVAL - elapsed, _flush_progress, video_id
+        )
 
 
 # Object detection instance
 _object_detector = None
+_object_detector_lock = threading.Lock()
 
 def get_object_detector():
     """Get or create object detector instance."""
     global _object_detector
     if _object_detector is None:
-        from ..services.object_detector import ObjectDetector
-        _object_detector = ObjectDetector()
+        with _object_detector_lock:
+            if _object_detector is None:
+                from ..services.object_detector import ObjectDetector
+                _object_detector = ObjectDetector(
+                    use_tensorrt=config.video.yolo_tensorrt,
+                    int8_data=config.video.yolo_int8_data
+                )
     return _object_detector
 
 
 @router.post("/api/videos/{video_id}/detect", response_model=DetectionResponse)
-async def detect_objects(video_id: str, request: DetectionRequest):
+def detect_objects(video_id: str, request: DetectionRequest):
     """
     Detect objects in a video frame at a specific timestamp.
     
@@ -448,38 +761,78 @@ async def detect_objects(video_id: str, request: DetectionRequest):
     if not video_info:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video_path = video_info.get("path")
-    if not video_path or not os.path.exists(video_path):
+    video_path = resolve_video_path(video_info.get("path", ""), config.videos_dir)
+    if video_path is None:
         raise HTTPException(status_code=404, detail="Video file not found")
     
     # Get detector and run detection
     detector = get_object_detector()
     result = detector.detect_from_video(
-        video_path=video_path,
+        video_path=str(video_path),
         timestamp=request.timestamp,
         confidence_threshold=request.confidence_threshold
     )
     
-    # Count people and vehicles
-    person_count = sum(1 for d in result.detections if d.class_name == "person")
-    vehicle_classes = {"car", "motorcycle", "bus", "truck", "bicycle"}
-    vehicle_count = sum(1 for d in result.detections if d.class_name in vehicle_classes)
+    # Return the response directly so FastAPI doesn't re-validate every detection
+    return ORJSONResponse(
+        _to_detection_response(video_id, request.timestamp, result).model_dump(mode="json")
+    )
+
+
+@router.post("/api/videos/{video_id}/detect/batch", response_model=List[DetectionResponse])
+def detect_objects_batch(video_id: str, request: DetectionBatchRequest):
+    """
+    Detect objects at several timestamps in one pass.
     
-    # Convert to response
-    detections = [
-        DetectedObject(
-            class_id=d.class_id,
-            class_name=d.class_name,
-            confidence=d.confidence,
-            bbox=d.bbox,
-            bbox_pixels=d.bbox_pixels
-        )
-        for d in result.detections
+    Frames are decoded in a single capture session in timestamp order and run
+    through YOLO in batches; results come back in request order.
+    """
+    library = get_video_library()
+    video_info = library.get_video(video_id)
+    
+    if not video_info:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    video_path = resolve_video_path(video_info.get("path", ""), config.videos_dir)
+    if video_path is None:
+        raise HTTPException(status_code=404, detail="Video file not found")
+    
+    detector = get_object_detector()
+    results = detector.detect_from_video_batch(
+        video_path=str(video_path),
+        timestamps=request.timestamps,
+        confidence_threshold=request.confidence_threshold,
+        priority_only=request.priority_only
+    )
+    
+    responses = [
+        _to_detection_response(video_id, timestamp, result)
+        for timestamp, result in zip(request.timestamps, results)
     ]
+    # Return the response directly; the whole list is dumped in one TypeAdapter call
+    return ORJSONResponse(DetectionResponseList.dump_python(responses, mode="json"))
+
+
+# COCO class ids used for the summary counts
+PERSON_CLASS_ID = 0
+VEHICLE_CLASS_IDS = np.array([1, 2, 3, 5, 7], dtype=np.int32)  # bicycle, car, motorcycle, bus, truck
+
+
+def _to_detection_response(video_id: str, timestamp: float, result) -> DetectionResponse:
+    """Build a DetectionResponse (with people/vehicle counts) from a DetectionResult."""
+    # Count people and vehicles on a class-id column instead of scanning objects twice
+    class_ids = np.fromiter(
+        (d.class_id for d in result.detections), dtype=np.int32, count=len(result.detections)
+    )
+    person_count = int(np.count_nonzero(class_ids == PERSON_CLASS_ID))
+    vehicle_count = int(np.isin(class_ids, VEHICLE_CLASS_IDS).sum())
+    
+    # Convert to response
+    detections = [DetectedObject.from_trusted(d) for d in result.detections]
     
-    return DetectionResponse(
+    return DetectionResponse.from_trusted(
         video_id=video_id,
-        timestamp=request.timestamp,
+        timestamp=timestamp,
         detections=detections,
         frame_width=result.frame_width,
         frame_height=result.frame_height,
@@ -491,18 +844,33 @@ async def detect_objects(video_id: str, request: DetectionRequest):
 
 # SAM2 tracker instance
 _sam2_tracker = None
+_sam2_tracker_lock = threading.Lock()
 
 def get_sam2_tracker():
     """Get or create SAM2 tracker instance."""
     global _sam2_tracker
     if _sam2_tracker is None:
-        from ..services.sam2_tracker import SAM2Tracker
-        _sam2_tracker = SAM2Tracker()
+        with _sam2_tracker_lock:
+            if _sam2_tracker is None:
+                from ..services.sam2_tracker import SAM2Tracker
+                _sam2_tracker = SAM2Tracker()
     return _sam2_tracker
 
 
+async def preload_services():
+    """Load model-backed singletons in parallel threads so first requests don't pay cold start."""
+    loaders = [get_qa_service, get_object_detector, get_sam2_tracker]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(loader) for loader in loaders),
+        return_exceptions=True
+    )
+    for loader, result in zip(loaders, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Preload failed for {loader.__name__}: {result}")
+
+
 @router.post("/api/videos/{video_id}/segment", response_model=SegmentResponse)
-async def segment_object(video_id: str, request: SegmentRequest):
+def segment_object(video_id: str, request: SegmentRequest):
     """
     Segment an object at the clicked point using SAM2.
     
@@ -514,14 +882,14 @@ async def segment_object(video_id: str, request: SegmentRequest):
     if not video_info:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video_path = video_info.get("path")
-    if not video_path or not os.path.exists(video_path):
+    video_path = resolve_video_path(video_info.get("path", ""), config.videos_dir)
+    if video_path is None:
         raise HTTPException(status_code=404, detail="Video file not found")
     
     # Get tracker and run segmentation
     tracker = get_sam2_tracker()
     result = tracker.segment_from_video(
-        video_path=video_path,
+        video_path=str(video_path),
         timestamp=request.timestamp,
         x=request.x,
         y=request.y
@@ -2,7 +2,7 @@
 import os
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -18,6 +18,7 @@ class NIMConfig:
     # NVIDIA Cloud API endpoints - using correct model names
     vlm_url: str = "https://integrate.api.nvidia.com/v1"
     vlm_model: str = "meta/llama-3.2-90b-vision-instruct"  # Vision-language model
+    vlm_max_side: Optional[int] = 672  # Downscale frames to this longest side before upload
     
     embedding_url: str = "https://integrate.api.nvidia.com/v1"
     embedding_model: str = "nvidia/nv-embedqa-e5-v5"  # Embedding model
@@ -34,11 +35,45 @@ class NIMConfig:
 class VideoConfig:
     """Video processing configuration."""
     frame_sample_interval: float = 3.0  # Extract 1 frame every 3 seconds (faster processing)
-    max_frames_per_batch: int = 10
+    max_frames_per_batch: int = 32  # Frame descriptions embedded per request during processing
+    vlm_batch_size: int = 4  # Frames each video submits to the VLM at a time
+    vlm_batch_max: int = 8  # Frames coalesced across videos into one VLM call (one generate() locally)
+    # VLM_LOAD_IN_8BIT=true loads the LLaVA language model with INT8 weights (needs bitsandbytes)
+    vlm_load_in_8bit: bool = field(
+        default_factory=lambda: os.getenv("VLM_LOAD_IN_8BIT", "false").lower() == "true"
+    )
+    # VLM_PROMPT_LOOKUP_TOKENS>0 enables draft-free speculative decoding (only with vlm_batch_size=1)
+    vlm_prompt_lookup_tokens: int = field(
+        default_factory=lambda: int(os.getenv("VLM_PROMPT_LOOKUP_TOKENS", "0"))
+    )
+    # VLM_TORCH_COMPILE=true compiles the LLaVA forward pass (slow first frames while it warms up)
+    vlm_torch_compile: bool = field(
+        default_factory=lambda: os.getenv("VLM_TORCH_COMPILE", "false").lower() == "true"
+    )
+    vlm_prompt: str = field(default_factory=lambda: os.getenv("VLM_PROMPT", "full"))  # "full" or "concise"
+    # YOLO_TENSORRT=true runs the detector as a TensorRT engine (exported once, next to the .pt)
+    yolo_tensorrt: bool = field(
+        default_factory=lambda: os.getenv("YOLO_TENSORRT", "false").lower() == "true"
+    )
+    # YOLO_INT8_DATA=<dataset yaml> calibrates an INT8 engine instead of FP16
+    yolo_int8_data: Optional[str] = field(default_factory=lambda: os.getenv("YOLO_INT8_DATA") or None)
     supported_formats: tuple = (".mp4", ".avi", ".mkv", ".mov", ".webm")
     thumbnail_size: tuple = (320, 180)
     use_local_vlm: bool = True  # Use local GPU VLM (LLaVA) instead of cloud API
     use_local_embedding: bool = True  # Use local GPU embeddings instead of cloud API
+    # EMBEDDING_ONNX_PATH points at an ONNX export of the embedding model (run via ONNX Runtime)
+    embedding_onnx_path: Optional[str] = field(default_factory=lambda: os.getenv("EMBEDDING_ONNX_PATH") or None)
+    max_upload_bytes: int = 4 * 1024 ** 3  # Reject uploads larger than 4 GB
+    # CTranslate2 compute type on GPU; "auto" picks by capability, "int8_float16" forces
+    # INT8 weight-only (CPU always uses int8)
+    whisper_compute_type: str = field(default_factory=lambda: os.getenv("WHISPER_COMPUTE_TYPE", "auto"))
+
+
+@dataclass
+class ProcessingConfig:
+    """Background video processing configuration."""
+    max_concurrent: int = 2  # Number of videos processed at the same time
+    whisper_concurrency: int = 1  # Concurrent Whisper transcriptions (1 per GPU)
 
 
 @dataclass
@@ -47,9 +82,20 @@ class MilvusConfig:
     db_path: str = "./data/milvus/video_qa.db"
     collection_name: str = "video_descriptions_local"  # New collection for local embeddings
     embedding_dim: int = 384  # sentence-transformers/all-MiniLM-L6-v2 dimension
-    index_type: str = "FLAT"
+    # HNSW by default; MILVUS_USE_ANN=false falls back to exact FLAT search
+    index_type: str = field(
+        default_factory=lambda: "FLAT" if os.getenv("MILVUS_USE_ANN", "true").lower() == "false" else "HNSW"
+    )
+    index_params: Dict[str, Any] = field(default_factory=lambda: {"M": 16, "efConstruction": 200})
+    search_params: Dict[str, Any] = field(default_factory=lambda: {"ef": 64})
+    vector_dtype: str = "float32"  # "float16" halves vector storage (requires a new collection)
     metric_type: str = "COSINE"
     top_k: int = 5
+    semantic_cache_tau: float = 0.05  # Max cosine distance for global_search to reuse a cached query
+    semantic_cache_size: int = 512
+    embedding_cache_size: int = 4096  # Query embeddings kept by text hash (LRU, 1 h TTL)
+    # EMBEDDING_CACHE_DIR=<dir> keeps embedding caches in mmap'd files that survive restarts
+    embedding_cache_dir: Optional[str] = field(default_factory=lambda: os.getenv("EMBEDDING_CACHE_DIR") or None)
 
 
 @dataclass 
@@ -70,6 +116,7 @@ class AppConfig:
     nim: NIMConfig = field(default_factory=NIMConfig)
     video: VideoConfig = field(default_factory=VideoConfig)
     milvus: MilvusConfig = field(default_factory=MilvusConfig)
+    processing: ProcessingConfig = field(default_factory=ProcessingConfig)
     
     def __post_init__(self):
         """Ensure directories exist."""
@@ -1,14 +1,17 @@
 """FastAPI main application entry point."""
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+import anyio.to_thread
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api.routes import router
+from .api.routes import router, preload_services, get_video_library
 from .config import config
+from .services.nim_client import get_shared_session, close_shared_session
 
 # Configure logging
 logging.basicConfig(
@@ -17,11 +20,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Sync (def) route handlers run in anyio's threadpool; the default 40 threads
+# is too few when model inference holds a thread for seconds at a time
+THREADPOOL_SIZE = 200
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup and clean up on shutdown."""
+    logger.info("Starting Video Q&A Application...")
+    
+    # Ensure directories exist
+    config.videos_dir.mkdir(parents=True, exist_ok=True)
+    Path(config.milvus.db_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"Videos directory: {config.videos_dir}")
+    logger.info(f"Milvus database: {config.milvus.db_path}")
+    
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    
+    # Videos still "processing" were queued when the server last stopped
+    interrupted = get_video_library().reset_interrupted()
+    if interrupted:
+        logger.warning(f"Marked {len(interrupted)} interrupted videos as failed: {interrupted}")
+    
+    # One pooled HTTP session for all NIM clients
+    app.state.http_session = get_shared_session()
+    
+    # Warm model-backed singletons (VLM, embeddings, YOLO, SAM2) before serving
+    await preload_services()
+    
+    yield
+    
+    logger.info("Shutting down Video Q&A Application...")
+    close_shared_session()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Sentio",
     description="Ask questions about video content using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -68,22 +109,3 @@ if static_path.exists():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "version": "1.0.0"}
-
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup."""
-    logger.info("Starting Video Q&A Application...")
-    
-    # Ensure directories exist
-    config.videos_dir.mkdir(parents=True, exist_ok=True)
-    Path(config.milvus.db_path).parent.mkdir(parents=True, exist_ok=True)
-    
-    logger.info(f"Videos directory: {config.videos_dir}")
-    logger.info(f"Milvus database: {config.milvus.db_path}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown."""
-    logger.info("Shutting down Video Q&A Application...")
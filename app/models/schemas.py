@@ -1,9 +1,11 @@
 """Pydantic models for API request/response schemas."""
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field
+from typing import Optional, List, Tuple
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+
 
 class ProcessingStatus(str, Enum):
     """Video processing status."""
@@ -26,10 +28,8 @@ class VideoInfo(BaseModel):
     processed_at: Optional[datetime] = None
     thumbnail_url: Optional[str] = None
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    # Built once per request and never mutated; datetimes serialize as ISO 8601
+    model_config = ConfigDict(frozen=True, extra="forbid")
 
 
 class VideoUploadResponse(BaseModel):
@@ -41,6 +41,8 @@ class VideoUploadResponse(BaseModel):
 
 class ProcessingProgress(BaseModel):
     """Real-time processing progress."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     video_id: str
     status: ProcessingStatus
     current_frame: int = 0
@@ -48,6 +50,7 @@ class ProcessingProgress(BaseModel):
     current_timestamp: float = 0.0
     message: str = ""
     
+    @computed_field
     @property
     def progress_percent(self) -> float:
         if self.total_frames == 0:
@@ -63,13 +66,26 @@ class QuestionRequest(BaseModel):
 
 class TimestampSource(BaseModel):
     """A source timestamp with description."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     timestamp: float
     description: str
     relevance_score: float
+    
+    @classmethod
+    def from_trusted(cls, timestamp: float, description: str, relevance_score: float) -> "TimestampSource":
+        """Build from vector store hits without running validation."""
+        return cls.model_construct(
+            timestamp=timestamp,
+            description=description,
+            relevance_score=relevance_score
+        )
 
 
 class AnswerResponse(BaseModel):
     """Response to a user question."""
+    model_config = ConfigDict(frozen=True)
+    
     answer: str
     sources: List[TimestampSource] = []
     video_id: str
@@ -82,7 +98,19 @@ class FrameDescription(BaseModel):
     frame_number: int
     timestamp: float
     description: str
-    embedding: Optional[List[float]] = None
+    embedding: Optional[bytes] = None  # Packed float32 vector; see embedding_array
+    
+    @staticmethod
+    def pack_embedding(embedding) -> bytes:
+        """Pack an embedding into float32 bytes for the embedding field."""
+        return np.asarray(embedding, dtype=np.float32).tobytes()
+    
+    @property
+    def embedding_array(self) -> Optional[np.ndarray]:
+        """Zero-copy float32 view of the packed embedding."""
+        if self.embedding is None:
+            return None
+        return np.frombuffer(self.embedding, dtype=np.float32)
 
 
 class VideoListResponse(BaseModel):
@@ -91,6 +119,11 @@ class VideoListResponse(BaseModel):
     total: int
 
 
+# Prebuilt adapters for hot serialization paths (one Rust-side pass per call)
+VideoInfoList = TypeAdapter(List[VideoInfo])
+ProgressAdapter = TypeAdapter(ProcessingProgress)
+
+
 class GlobalSearchRequest(BaseModel):
     """Request for global search across all videos."""
     query: str = Field(..., min_length=1, max_length=1000)
@@ -107,6 +140,9 @@ class GlobalSearchResult(BaseModel):
     thumbnail_url: Optional[str] = None
 
 
+GlobalSearchResultList = TypeAdapter(List[GlobalSearchResult])
+
+
 class GlobalSearchResponse(BaseModel):
     """Response for global search."""
     query: str
@@ -117,11 +153,24 @@ class GlobalSearchResponse(BaseModel):
 
 class DetectedObject(BaseModel):
     """A single detected object."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     class_id: int
     class_name: str
     confidence: float
-    bbox: List[float]  # [x1, y1, x2, y2] normalized 0-1
-    bbox_pixels: List[int]  # [x1, y1, x2, y2] in pixels
+    bbox: Tuple[float, float, float, float]  # [x1, y1, x2, y2] normalized 0-1
+    bbox_pixels: Tuple[int, int, int, int]  # [x1, y1, x2, y2] in pixels
+    
+    @classmethod
+    def from_trusted(cls, detection) -> "DetectedObject":
+        """Build from an ObjectDetector Detection without running validation."""
+        return cls.model_construct(
+            class_id=detection.class_id,
+            class_name=detection.class_name,
+            confidence=detection.confidence,
+            bbox=detection.bbox,
+            bbox_pixels=detection.bbox_pixels
+        )
 
 
 class DetectionResponse(BaseModel):
@@ -134,6 +183,33 @@ class DetectionResponse(BaseModel):
     inference_time_ms: float
     person_count: int = 0
     vehicle_count: int = 0
+    
+    @classmethod
+    def from_trusted(
+        cls,
+        video_id: str,
+        timestamp: float,
+        detections: List[DetectedObject],
+        frame_width: int,
+        frame_height: int,
+        inference_time_ms: float,
+        person_count: int = 0,
+        vehicle_count: int = 0
+    ) -> "DetectionResponse":
+        """Build from detector output without running validation."""
+        return cls.model_construct(
+            video_id=video_id,
+            timestamp=timestamp,
+            detections=detections,
+            frame_width=frame_width,
+            frame_height=frame_height,
+            inference_time_ms=inference_time_ms,
+            person_count=person_count,
+            vehicle_count=vehicle_count
+        )
+
+
+DetectionResponseList = TypeAdapter(List[DetectionResponse])
 
 
 class DetectionRequest(BaseModel):
@@ -143,6 +219,13 @@ class DetectionRequest(BaseModel):
     priority_only: bool = False  # Only security-relevant classes
 
 
+class DetectionBatchRequest(BaseModel):
+    """Request for object detection at several timestamps (one decode session)."""
+    timestamps: List[float] = Field(..., min_length=1, max_length=256)
+    confidence_threshold: float = 0.15
+    priority_only: bool = False
+
+
 class SegmentRequest(BaseModel):
     """Request for SAM2 segmentation."""
     timestamp: float = 0.0
@@ -2,10 +2,11 @@
 import os
 import logging
 import subprocess
-import tempfile
 from typing import List, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # Check if faster-whisper is available
@@ -16,6 +17,58 @@ except ImportError:
     WHISPER_AVAILABLE = False
     logger.warning("faster-whisper not installed. Run: pip install faster-whisper")
 
+# Batched pipeline ships with faster-whisper >= 1.1
+try:
+    from faster_whisper import BatchedInferencePipeline
+    BATCHED_AVAILABLE = True
+except ImportError:
+    BATCHED_AVAILABLE = False
+
+
+# Whisper models expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+# GPUs with less memory than this get int8 weights to leave room for the VLM
+LOW_VRAM_BYTES = 8 * 1024 ** 3
+
+
+def resolve_compute_type(compute_type: str) -> str:
+    """
+    Resolve an "auto" compute type from the GPU's capability.
+    
+    Args:
+        compute_type: Requested CTranslate2 compute type, or "auto"
+        
+    Returns:
+        bfloat16 on Ampere+ (cc >= 8.0), float16 on Volta/Turing (cc >= 7.0),
+        int8_float16 on low-VRAM GPUs and int8 otherwise
+    """
+    if compute_type != "auto":
+        return compute_type
+    
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return "int8"
+        major, _ = torch.cuda.get_device_capability()
+        total_memory = torch.cuda.get_device_properties(0).total_memory
+    except ImportError:
+        return "int8_float16"
+    
+    if total_memory < LOW_VRAM_BYTES:
+        return "int8_float16"
+    if major >= 8:
+        try:
+            import ctranslate2
+            if "bfloat16" in ctranslate2.get_supported_compute_types("cuda"):
+                return "bfloat16"
+        except (ImportError, RuntimeError):
+            pass
+        return "float16"
+    if major >= 7:
+        return "float16"
+    return "int8"
+
 
 @dataclass
 class TranscriptionSegment:
@@ -32,34 +85,47 @@ class AudioTranscriber:
     Extracts audio from video and transcribes with timestamps.
     """
     
-    _instance: Optional['AudioTranscriber'] = None
     _model = None
+    _batched = None
     
     # Model options: tiny, base, small, medium, large-v2
     MODEL_SIZE = os.environ.get("WHISPER_MODEL", "base")
     
-    def __new__(cls):
-        """Singleton pattern."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    # Number of VAD chunks decoded together by the batched pipeline
+    BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "16"))
+    
+    # Greedy decoding: each beam is a full decoder pass, and beam search buys
+    # little accuracy on surveillance audio
+    DECODE_OPTIONS = {
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+    }
+    # Drop silences of half a second or more before decoding
+    VAD_PARAMETERS = {"min_silence_duration_ms": 500}
     
-    def __init__(self):
-        """Initialize the transcriber."""
+    def __init__(self, compute_type: str = "auto"):
+        """
+        Initialize the transcriber.
+        
+        Args:
+            compute_type: CTranslate2 compute type used on GPU (e.g. float16, int8_float16),
+                or "auto" to pick one from the GPU capability
+        """
         if not WHISPER_AVAILABLE:
             logger.warning("Whisper not available - transcription disabled")
             return
             
         if AudioTranscriber._model is None:
-            self._load_model()
+            self._load_model(resolve_compute_type(compute_type))
     
-    def _load_model(self):
+    def _load_model(self, compute_type: str):
         """Load the Whisper model."""
-        logger.info(f"Loading Whisper model: {self.MODEL_SIZE}")
+        logger.info(f"Loading Whisper model: {self.MODEL_SIZE} ({compute_type})")
         
         # Use GPU if available
         device = "cuda"
-        compute_type = "float16"
         
         try:
             AudioTranscriber._model = WhisperModel(
@@ -76,53 +142,56 @@ class AudioTranscriber:
                 compute_type="int8"
             )
             logger.info("Whisper model loaded on CPU")
+        
+        # Wrap in batched pipeline: VAD splits audio into chunks that are decoded together
+        if BATCHED_AVAILABLE:
+            AudioTranscriber._batched = BatchedInferencePipeline(model=AudioTranscriber._model)
+            logger.info(f"Using batched Whisper inference (batch_size={self.BATCH_SIZE})")
     
-    def extract_audio(self, video_path: str) -> Optional[str]:
+    def extract_audio(self, video_path: str) -> Optional[np.ndarray]:
         """
         Extract audio from video file.
         
+        ffmpeg writes raw PCM to stdout, so nothing touches the filesystem.
+        
         Args:
             video_path: Path to video file
             
         Returns:
-            Path to temporary audio file, or None if failed
+            16 kHz mono float32 samples in [-1, 1], or None if failed
         """
-        # Create temp file for audio
-        temp_audio = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        temp_audio.close()
-        
         try:
             # Use ffmpeg to extract audio
             cmd = [
-                "ffmpeg", "-y", "-i", video_path,
+                "ffmpeg", "-nostdin", "-loglevel", "error", "-i", video_path,
                 "-vn",  # No video
-                "-acodec", "pcm_s16le",  # WAV format
-                "-ar", "16000",  # 16kHz sample rate (Whisper expects this)
+                "-f", "s16le",  # Raw 16-bit PCM
+                "-acodec", "pcm_s16le",
+                "-ar", str(SAMPLE_RATE),  # 16kHz sample rate (Whisper expects this)
                 "-ac", "1",  # Mono
-                temp_audio.name
+                "pipe:1"
             ]
             
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
                 timeout=300  # 5 min timeout
             )
             
             if result.returncode != 0:
-                logger.error(f"ffmpeg error: {result.stderr}")
-                os.unlink(temp_audio.name)
+                logger.error(f"ffmpeg error: {result.stderr.decode(errors='replace')}")
                 return None
-                
-            return temp_audio.name
+            
+            # Scale in place: one float32 buffer instead of two
+            audio = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32)
+            audio *= 1.0 / 32768.0
+            return audio
             
         except subprocess.TimeoutExpired:
             logger.error("ffmpeg timed out")
-            os.unlink(temp_audio.name)
             return None
         except FileNotFoundError:
             logger.error("ffmpeg not found - please install it")
-            os.unlink(temp_audio.name)
             return None
     
     def transcribe(self, video_path: str) -> List[TranscriptionSegment]:
@@ -141,40 +210,45 @@ class AudioTranscriber:
         
         # Extract audio
         logger.info(f"Extracting audio from {video_path}")
-        audio_path = self.extract_audio(video_path)
+        audio = self.extract_audio(video_path)
         
-        if not audio_path:
+        if audio is None or audio.size == 0:
             logger.warning("Failed to extract audio")
             return []
         
-        try:
-            # Transcribe
-            logger.info("Transcribing audio...")
+        # Transcribe
+        logger.info("Transcribing audio...")
+        if AudioTranscriber._batched is not None:
+            segments, info = AudioTranscriber._batched.transcribe(
+                audio,
+                batch_size=self.BATCH_SIZE,
+                **self.DECODE_OPTIONS,
+                word_timestamps=False,  # Segment-level is enough
+                vad_filter=True,  # VAD chunks become the batch items
+                vad_parameters=self.VAD_PARAMETERS,
+            )
+        else:
             segments, info = AudioTranscriber._model.transcribe(
-                audio_path,
-                beam_size=5,
+                audio,
+                **self.DECODE_OPTIONS,
                 word_timestamps=False,  # Segment-level is enough
                 vad_filter=True,  # Filter out silence
+                vad_parameters=self.VAD_PARAMETERS,
             )
-            
-            logger.info(f"Detected language: {info.language} ({info.language_probability:.2%})")
-            
-            # Convert to our format
-            result = []
-            for segment in segments:
-                result.append(TranscriptionSegment(
-                    start=segment.start,
-                    end=segment.end,
-                    text=segment.text.strip()
-                ))
-            
-            logger.info(f"Transcribed {len(result)} segments")
-            return result
-            
-        finally:
-            # Clean up temp file
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
+        
+        logger.info(f"Detected language: {info.language} ({info.language_probability:.2%})")
+        
+        # Convert to our format
+        result = []
+        for segment in segments:
+            result.append(TranscriptionSegment(
+                start=segment.start,
+                end=segment.end,
+                text=segment.text.strip()
+            ))
+        
+        logger.info(f"Transcribed {len(result)} segments")
+        return result
     
     def transcribe_segments(
         self, 
@@ -196,36 +270,25 @@ class AudioTranscriber:
         if not raw_segments:
             return []
         
-        # Group into larger segments
+        # Group into larger segments: each group runs from its first segment up to the
+        # first segment ending segment_duration or more after the group start
+        starts = np.fromiter((seg.start for seg in raw_segments), dtype=np.float64, count=len(raw_segments))
+        ends = np.fromiter((seg.end for seg in raw_segments), dtype=np.float64, count=len(raw_segments))
+        # Whisper emits segments in order; the running max keeps searchsorted valid regardless
+        ends_sorted = np.maximum.accumulate(ends)
+        
         consolidated = []
-        current_text = []
-        current_start = 0.0
-        current_end = 0.0
-        
-        for seg in raw_segments:
-            # Start new segment if needed
-            if not current_text:
-                current_start = seg.start
-            
-            current_text.append(seg.text)
-            current_end = seg.end
-            
-            # If we've exceeded segment duration, save and reset
-            if current_end - current_start >= segment_duration:
-                consolidated.append(TranscriptionSegment(
-                    start=current_start,
-                    end=current_end,
-                    text=" ".join(current_text)
-                ))
-                current_text = []
-        
-        # Don't forget last segment
-        if current_text:
+        first = 0
+        while first < len(raw_segments):
+            # Index of the segment that closes this group (or the last segment)
+            last = int(np.searchsorted(ends_sorted, starts[first] + segment_duration, side="left"))
+            last = min(max(last, first), len(raw_segments) - 1)
             consolidated.append(TranscriptionSegment(
-                start=current_start,
-                end=current_end,
-                text=" ".join(current_text)
+                start=float(starts[first]),
+                end=float(ends[last]),
+                text=" ".join(seg.text for seg in raw_segments[first:last + 1])
             ))
+            first = last + 1
         
         return consolidated
 
@@ -237,5 +300,6 @@ def get_audio_transcriber() -> AudioTranscriber:
     """Get or create audio transcriber instance."""
     global _transcriber
     if _transcriber is None:
-        _transcriber = AudioTranscriber()
+        from ..config import config
+        _transcriber = AudioTranscriber(compute_type=config.video.whisper_compute_type)
     return _transcriber
@@ -0,0 +1,196 @@
+"""Embedding caches: in-memory LRU + TTL, and a disk-backed variant."""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings with a time-to-live.
+    
+    Keys are a 128-bit blake2b of model|text, so switching embedding
+    models never returns vectors from the wrong space.
+    """
+    
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of cached embeddings
+            ttl: Seconds before an entry expires
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Build the cache key for a model/text pair."""
+        return hashlib.blake2b(f"{model}|{text}".encode(), digest_size=16).hexdigest()
+    
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached embedding, or None if missing or expired."""
+        key = self.make_key(model, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, model: str, text: str, embedding: List[float]):
+        """Store an embedding, evicting the least recently used entry when full."""
+        key = self.make_key(model, text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskEmbeddingCache:
+    """
+    Embedding cache in a memory-mapped .npy file that survives restarts.
+    
+    Each row is a 16-byte key digest followed by a float32 vector, so a
+    lookup reads one row straight from the page cache with no
+    deserialization. Rows are written ring-buffer style once the file is
+    full; the write cursor lives in a one-int64 <path>.cursor file mapped
+    the same way, so after a restart the oldest row is still the next one
+    overwritten. Several processes may map the same file (the server and
+    add_audio_transcription.py); each keeps its own index, so a row's
+    stored key is checked on every hit. Entries never expire: keys include the model, and an embedding
+    does not change for a given model and text. Same get/put interface as
+    EmbeddingCache.
+    """
+    
+    def __init__(self, path: str, maxsize: int = 100_000, flush_every: int = 64):
+        """
+        Initialize the cache, reopening the file at path if it exists.
+        
+        Args:
+            path: .npy file backing the cache
+            maxsize: Rows allocated when the file is created
+            flush_every: Puts between msync calls
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.flush_every = flush_every
+        self._rows: Optional[np.memmap] = None
+        self._cursor: Optional[np.memmap] = None  # [next row to write]
+        self._index: Dict[bytes, int] = {}
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        if os.path.exists(path):
+            self._open()
+    
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """Build the 16-byte row key for a model/text pair."""
+        return hashlib.blake2b(f"{model}|{text}".encode(), digest_size=16).digest()
+    
+    def _open(self):
+        """Map the existing file and rebuild the key -> row index."""
+        self._rows = np.load(self.path, mmap_mode="r+")
+        self.maxsize = len(self._rows)
+        keys = np.ascontiguousarray(self._rows["key"])
+        used = np.flatnonzero(keys.view(np.uint8).reshape(len(keys), 16).any(axis=1))
+        self._index = {keys[row].tobytes(): int(row) for row in used}
+        cursor_path = self.path + ".cursor"
+        if os.path.exists(cursor_path):
+            self._cursor = np.memmap(cursor_path, dtype=np.int64, mode="r+", shape=(1,))
+            self._cursor[0] %= self.maxsize
+        else:
+            # Files written before the cursor existed: resume after the used rows
+            self._cursor = np.memmap(cursor_path, dtype=np.int64, mode="w+", shape=(1,))
+            self._cursor[0] = len(used) % self.maxsize
+        logger.info(f"Embedding cache {self.path}: {len(self._index)} entries")
+    
+    def _create(self, dim: int):
+        """Create (or replace) the backing file for dim-sized vectors."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        row_dtype = np.dtype([("key", "V16"), ("vector", "<f4", (dim,))])
+        self._rows = np.lib.format.open_memmap(self.path, mode="w+", dtype=row_dtype, shape=(self.maxsize,))
+        self._cursor = np.memmap(self.path + ".cursor", dtype=np.int64, mode="w+", shape=(1,))
+        self._index.clear()
+    
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding, or None if missing."""
+        key = self.make_key(model, text)
+        with self._lock:
+            row = self._index.get(key)
+            # Another process mapping the same file may have reused the row
+            if row is None or self._rows["key"][row].tobytes() != key:
+                if row is not None:
+                    del self._index[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Copy out so a later overwrite of the row can't change the result
+            return np.array(self._rows["vector"][row])
+    
+    def put(self, model: str, text: str, embedding):
+        """Store an embedding, overwriting the oldest row when full."""
+        key = self.make_key(model, text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if self._rows is None or self._rows["vector"].shape[1:] != vector.shape:
+                # First write, or the embedding dimension changed with the model
+                self._create(vector.shape[0])
+            
+            row = self._index.get(key)
+            if row is None:
+                row = int(self._cursor[0])
+                self._cursor[0] = (row + 1) % self.maxsize
+                self._index.pop(self._rows["key"][row].tobytes(), None)
+                self._index[key] = row
+            
+            self._rows["key"][row] = np.void(key)
+            self._rows["vector"][row] = vector
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._rows.flush()
+                self._cursor.flush()
+                self._unflushed = 0
+    
+    def flush(self):
+        """Write pending rows to disk."""
+        with self._lock:
+            if self._rows is not None:
+                self._rows.flush()
+                self._cursor.flush()
+            self._unflushed = 0
+    
+    def clear(self):
+        """Drop all cached embeddings (the file is emptied, not deleted)."""
+        with self._lock:
+            if self._rows is not None:
+                self._rows["key"] = np.void(bytes(16))
+                self._rows.flush()
+                self._cursor[0] = 0
+                self._cursor.flush()
+            self._index.clear()
@@ -3,31 +3,56 @@ import torch
 from sentence_transformers import SentenceTransformer
 from typing import List, Optional
 import logging
+from dataclasses import dataclass
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# ONNX Runtime backend (optional) for an exported, INT8-quantized MiniLM
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
 # Using a fast, lightweight model - downloads ~100MB on first use
 MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 truncates inputs at 256 tokens
+BATCH_SIZE = 32  # Texts per forward pass; sorted by length so padding stays small
+
+
+@dataclass
+class EmbedResponse:
+    """Embedding result - compatible with cloud client EmbeddingResponse."""
+    embedding: np.ndarray
 
 
 class LocalEmbeddingClient:
     """Local embedding client using sentence-transformers on GPU."""
     
-    _instance: Optional['LocalEmbeddingClient'] = None
     _model = None
+    _tokenizer = None  # Set only when running on the ONNX Runtime backend
+    _dtype = np.float32  # Output dtype; float16 matches a float16 vector collection
     
-    def __new__(cls):
-        """Singleton pattern to avoid loading model multiple times."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        """Initialize the local embedding client."""
+    def __init__(self, onnx_path: Optional[str] = None, dtype: str = "float32"):
+        """
+        Initialize the local embedding client.
+        
+        Args:
+            onnx_path: Directory of an ONNX export of MODEL_ID (e.g. INT8-quantized
+                with optimum-cli); uses sentence-transformers when unset
+            dtype: "float32" or "float16" for emitted embeddings
+        """
+        LocalEmbeddingClient._dtype = np.float16 if dtype == "float16" else np.float32
         if LocalEmbeddingClient._model is None:
-            self._load_model()
+            if onnx_path and ONNX_AVAILABLE:
+                self._load_onnx_model(onnx_path)
+            else:
+                if onnx_path:
+                    logger.warning("optimum[onnxruntime] not installed - using sentence-transformers")
+                self._load_model()
     
     def _load_model(self):
         """Load the sentence-transformers model."""
@@ -38,6 +63,45 @@ class LocalEmbeddingClient:
         
         logger.info(f"Embedding model loaded on {device}")
     
+    def _load_onnx_model(self, onnx_path: str):
+        """Load an ONNX export of the embedding model into ONNX Runtime."""
+        logger.info(f"Loading ONNX embedding model from {onnx_path}...")
+        
+        provider = "CUDAExecutionProvider" if torch.cuda.is_available() else "CPUExecutionProvider"
+        LocalEmbeddingClient._tokenizer = AutoTokenizer.from_pretrained(onnx_path)
+        LocalEmbeddingClient._model = ORTModelForFeatureExtraction.from_pretrained(onnx_path, provider=provider)
+        
+        logger.info(f"ONNX embedding model loaded with {provider}")
+    
+    def _encode_onnx(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with the ONNX session, mean-pooled and L2-normalized like sentence-transformers.
+        
+        Texts are sorted by token length and run in batches of BATCH_SIZE, so each
+        batch pads only to its own longest text; results come back in input order.
+        """
+        lengths = self._tokenizer(texts, truncation=True, max_length=MAX_SEQ_LENGTH, return_length=True)["length"]
+        order = np.argsort(lengths, kind="stable")
+        
+        embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for start in range(0, len(texts), BATCH_SIZE):
+            idx = order[start:start + BATCH_SIZE]
+            inputs = self._tokenizer(
+                [texts[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="np"
+            )
+            hidden = self._model(**inputs).last_hidden_state
+            hidden = hidden.cpu().numpy() if hasattr(hidden, "cpu") else np.asarray(hidden)
+            
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            embeddings[idx] = pooled / np.clip(norms, 1e-12, None)
+        return embeddings
+    
     def embed(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
@@ -46,7 +110,7 @@ class LocalEmbeddingClient:
             texts: List of text strings to embed
             
         Returns:
-            numpy array of embeddings with shape (len(texts), EMBEDDING_DIM)
+            Unit-norm numpy array of embeddings with shape (len(texts), EMBEDDING_DIM)
         """
         if not texts:
             return np.array([])
@@ -54,37 +118,88 @@ class LocalEmbeddingClient:
         # Filter out empty texts
         valid_texts = [t if t else "empty" for t in texts]
         
+        if self._tokenizer is not None:
+            return self._encode_onnx(valid_texts).astype(self._dtype, copy=False)
+        
+        # encode() already sorts by length and pads per batch of batch_size
         embeddings = self._model.encode(
             valid_texts,
+            batch_size=BATCH_SIZE,
             convert_to_numpy=True,
+            normalize_embeddings=True,  # Cosine scores become plain dot products
             show_progress_bar=False
         )
         
-        return embeddings
+        # Cast once here so the vector store does not re-convert every row
+        return embeddings.astype(self._dtype, copy=False)
+    
+    def embed_torch(self, texts: List[str]) -> torch.Tensor:
+        """
+        Generate embeddings as a tensor that stays on the model's device.
+        
+        For GPU-side consumers (e.g. torch.mm similarity); skips the device-to-host
+        copy that embed() needs for Milvus.
+        
+        Args:
+            texts: List of text strings to embed
+            
+        Returns:
+            Unit-norm tensor of shape (len(texts), EMBEDDING_DIM)
+        """
+        valid_texts = [t if t else "empty" for t in texts]
+        
+        if self._tokenizer is not None:
+            # ONNX Runtime hands back host arrays
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            return torch.from_numpy(self._encode_onnx(valid_texts)).to(device)
+        
+        return self._model.encode(
+            valid_texts,
+            batch_size=BATCH_SIZE,
+            convert_to_tensor=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
     
     def embed_single(self, text: str) -> np.ndarray:
         """Embed a single text string."""
         return self.embed([text])[0]
     
-    def embed_text(self, text: str):
+    def embed_text(self, text: str) -> EmbedResponse:
         """Embed text - compatible with cloud client interface."""
-        embedding = self.embed_single(text)
-        # Return object with .embedding attribute
-        class EmbedResponse:
-            def __init__(self, emb):
-                self.embedding = emb.tolist()
-        return EmbedResponse(embedding)
+        return EmbedResponse(embedding=self.embed_single(text))
     
-    def embed_query(self, query: str):
+    def embed_query(self, query: str) -> EmbedResponse:
         """Embed query - compatible with cloud client interface."""
         return self.embed_text(query)
     
+    def embed_texts(self, texts: List[str]) -> List[EmbedResponse]:
+        """Embed many texts in one forward pass - compatible with cloud client interface."""
+        if not texts:
+            return []
+        return [EmbedResponse(embedding=emb) for emb in self.embed(texts)]
+    
     @property
     def embedding_dim(self) -> int:
         """Return the embedding dimension."""
         return EMBEDDING_DIM
 
 
+# Singleton accessor
+_embedding_client: Optional[LocalEmbeddingClient] = None
+
+def get_local_embedding_client() -> LocalEmbeddingClient:
+    """Get or create the local embedding client (model state is shared at class level)."""
+    global _embedding_client
+    if _embedding_client is None:
+        from ..config import config
+        _embedding_client = LocalEmbeddingClient(
+            onnx_path=config.video.embedding_onnx_path,
+            dtype=config.milvus.vector_dtype
+        )
+    return _embedding_client
+
+
 # Test if run directly
 if __name__ == "__main__":
     print("Testing local embeddings...")
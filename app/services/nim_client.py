@@ -1,21 +1,49 @@
 """NVIDIA NIM API Client for VLM, Embedding, and LLM models."""
 import base64
+import orjson
 import requests
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, List, Optional, Dict, Any, TypeVar
 from dataclasses import dataclass
 import logging
 import numpy as np
+import cv2
+from .embedding_cache import EmbeddingCache, DiskEmbeddingCache
 from PIL import Image
 import io
+import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# libjpeg-turbo straight from numpy (optional); Pillow is the fallback
+try:
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Requests fanned out concurrently per batch (VLM frames, embedding chunks)
+MAX_CONCURRENT_REQUESTS = 16
+# Texts per embeddings request; NIM embedding servers reject larger batches
+MAX_EMBED_BATCH = 96
+
 
 class NIMClientError(Exception):
     """Exception for NIM API errors."""
     pass
 
 
+class NIMUnavailableError(NIMClientError):
+    """The endpoint itself failed (timeout, connection error, 5xx), not the input."""
+    pass
+
+
 @dataclass
 class VLMResponse:
     """Response from VLM model."""
@@ -26,7 +54,7 @@ class VLMResponse:
 @dataclass
 class EmbeddingResponse:
     """Response from embedding model."""
-    embedding: List[float]
+    embedding: np.ndarray  # 1-D float32 (or float16) vector
     raw_response: Dict[str, Any]
 
 
@@ -37,58 +65,168 @@ class LLMResponse:
     raw_response: Dict[str, Any]
 
 
+# One pooled session shared by every NIM client, so VLM, embedding and LLM
+# calls reuse keep-alive connections (and TLS sessions) to the NIM host
+_shared_session: Optional[requests.Session] = None
+
+
+def get_shared_session() -> requests.Session:
+    """Get or create the pooled HTTP session shared by NIM clients."""
+    global _shared_session
+    if _shared_session is None:
+        session = requests.Session()
+        # Enough pooled sockets for the concurrent request fan-out; transient
+        # gateway errors are retried with a short backoff. Only those: a read
+        # timeout must not re-send a (non-idempotent) POST the server may still
+        # be running, and connect failures get one quick retry at most
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                connect=1,
+                read=0,
+                other=0,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset({"POST"})
+            )
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _shared_session = session
+    return _shared_session
+
+
+# Worker threads that overlap NIM round-trips; the pooled session is shared by all
+_request_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_request_pool() -> ThreadPoolExecutor:
+    """Get or create the thread pool used to fan out concurrent NIM requests."""
+    global _request_pool
+    if _request_pool is None:
+        _request_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="nim")
+    return _request_pool
+
+
+def close_shared_session():
+    """Close the shared session and its pooled connections."""
+    global _shared_session, _request_pool
+    if _request_pool is not None:
+        _request_pool.shutdown(wait=False)
+        _request_pool = None
+    if _shared_session is not None:
+        _shared_session.close()
+        _shared_session = None
+
+
 class BaseNIMClient:
     """Base client for NVIDIA NIM endpoints."""
     
-    def __init__(self, base_url: str, model: str, api_key: str = "", timeout: int = 120):
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str = "",
+        timeout: int = 120,
+        session: Optional[requests.Session] = None
+    ):
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.timeout = timeout
         self.api_key = api_key
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         
-        headers = {
+        # Per-client headers, sent with each request so a shared session stays neutral
+        self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json" 
         }
         # Add API key if provided (for NVIDIA Cloud API)
         if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
-        
-        self.session.headers.update(headers)
+            self.headers["Authorization"] = f"Bearer {api_key}"
     
     def _make_request(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make a POST request to NIM endpoint."""
         url = f"{self.base_url}/{endpoint}"
         try:
-            response = self.session.post(url, json=payload, timeout=self.timeout)
+            # orjson encodes the large base64 image strings and float arrays in C
+            response = self.session.post(url, data=orjson.dumps(payload), headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except requests.exceptions.Timeout:
-            raise NIMClientError(f"Request timed out after {self.timeout}s")
+            raise NIMUnavailableError(f"Request timed out after {self.timeout}s")
         except requests.exceptions.ConnectionError:
-            raise NIMClientError(f"Could not connect to NIM endpoint: {url}")
+            raise NIMUnavailableError(f"Could not connect to NIM endpoint: {url}")
         except requests.exceptions.HTTPError as e:
-            raise NIMClientError(f"HTTP error: {e.response.status_code} - {e.response.text}")
+            error = NIMUnavailableError if e.response.status_code >= 500 else NIMClientError
+            raise error(f"HTTP error: {e.response.status_code} - {e.response.text}")
         except Exception as e:
             raise NIMClientError(f"Unexpected error: {str(e)}")
+    
+    def _map_concurrent(self, fn: Callable[[T], R], items: List[T]) -> List[R]:
+        """
+        Run one request per item concurrently, so network time and remote compute overlap.
+        
+        Args:
+            fn: Request function applied to each item
+            items: Inputs, one request each
+            
+        Returns:
+            Results in input order (the first NIMClientError is re-raised)
+        """
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(get_request_pool().map(fn, items))
 
 
 class VLMClient(BaseNIMClient):
     """Client for VILA VLM (Vision Language Model)."""
     
-    def __init__(self, base_url: str, model: str = "nvidia/vila", api_key: str = "", timeout: int = 120):
-        super().__init__(base_url, model, api_key, timeout)
+    def __init__(
+        self,
+        base_url: str,
+        model: str = "nvidia/vila",
+        api_key: str = "",
+        timeout: int = 120,
+        session: Optional[requests.Session] = None,
+        max_side: Optional[int] = 672
+    ):
+        super().__init__(base_url, model, api_key, timeout, session)
+        # Longest image side sent to the VLM (None keeps full resolution)
+        self.max_side = max_side
+        # Per-thread JPEG buffer reused across frames (describe_frames runs on a pool)
+        self._jpeg_buf = threading.local()
     
     def _encode_image(self, image: np.ndarray) -> str:
         """Convert numpy image to base64 string."""
         if image.dtype != np.uint8:
             image = (image * 255).astype(np.uint8)
         
+        # The VLM resizes to a few hundred pixels anyway; don't encode and upload more
+        h, w = image.shape[:2]
+        if self.max_side and max(h, w) > self.max_side:
+            scale = self.max_side / max(h, w)
+            image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        
+        if SIMPLEJPEG_AVAILABLE:
+            jpeg_bytes = simplejpeg.encode_jpeg(
+                np.ascontiguousarray(image), quality=85, colorspace="RGB", fastdct=True
+            )
+            return base64.b64encode(jpeg_bytes).decode('ascii')
+        
+        buffer = getattr(self._jpeg_buf, "buffer", None)
+        if buffer is None:
+            buffer = self._jpeg_buf.buffer = io.BytesIO()
+        buffer.seek(0)
+        buffer.truncate()
+        
         pil_image = Image.fromarray(image)
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format="JPEG", quality=85)
-        return base64.b64encode(buffer.getvalue()).decode('utf-8')
+        pil_image.save(buffer, format="JPEG", quality=85, optimize=False, progressive=False)
+        # Encode from a view of the buffer instead of a getvalue() copy
+        with buffer.getbuffer() as view:
+            return base64.b64encode(view).decode('ascii')
     
     def describe_frame(
         self, 
@@ -139,39 +277,84 @@ class VLMClient(BaseNIMClient):
             raise NIMClientError(f"Unexpected VLM response format: {response}")
         
         return VLMResponse(description=description, raw_response=response)
-
-
-class EmbeddingClient(BaseNIMClient):
-    """Client for NV-Embed-QA embedding model."""
-    
-    def __init__(self, base_url: str, model: str = "nvidia/nv-embed-qa", api_key: str = "", timeout: int = 60):
-        super().__init__(base_url, model, api_key, timeout)
     
-    def embed_text(self, text: str) -> EmbeddingResponse:
+    def describe_frames(self, images: List[np.ndarray], prompt: Optional[str] = None) -> List[VLMResponse]:
         """
-        Generate embedding for a text string.
+        Describe several frames with concurrent requests.
         
         Args:
-            text: Input text to embed
+            images: numpy arrays of the frames (RGB format)
+            prompt: instruction for the VLM (describe_frame's default if None)
             
         Returns:
-            EmbeddingResponse with embedding vector
+            One VLMResponse per frame, in input order
         """
+        if prompt is None:
+            return self._map_concurrent(self.describe_frame, images)
+        return self._map_concurrent(lambda image: self.describe_frame(image, prompt), images)
+
+
+class EmbeddingClient(BaseNIMClient):
+    """Client for NV-Embed-QA embedding model."""
+    
+    def __init__(
+        self,
+        base_url: str,
+        model: str = "nvidia/nv-embed-qa",
+        api_key: str = "",
+        timeout: int = 60,
+        session: Optional[requests.Session] = None,
+        cache_size: int = 8192,
+        dtype: str = "float32",
+        cache_path: Optional[str] = None
+    ):
+        super().__init__(base_url, model, api_key, timeout, session)
+        # Vectors come back as numpy arrays; float16 halves their memory
+        self._dtype = np.float16 if dtype == "float16" else np.float32
+        # Identical texts (re-indexed descriptions, repeated queries) skip the round-trip
+        # A cache_path keeps them on disk across restarts (e.g. nightly re-indexing)
+        if cache_path:
+            self._cache = DiskEmbeddingCache(cache_path)
+        else:
+            self._cache = EmbeddingCache(maxsize=cache_size) if cache_size else None
+    
+    def _embed_cached(self, text: str, input_type: str) -> EmbeddingResponse:
+        """Embed one text, serving repeats from the cache."""
+        cache_model = f"{self.model}|{input_type}"
+        if self._cache is not None:
+            embedding = self._cache.get(cache_model, text)
+            if embedding is not None:
+                return EmbeddingResponse(embedding=embedding, raw_response={"cached": True})
+        
         payload = {
             "model": self.model,
             "input": text,
-            "input_type": "passage"
+            "input_type": input_type
         }
         
         response = self._make_request("embeddings", payload)
         
         try:
-            embedding = response["data"][0]["embedding"]
+            embedding = np.asarray(response["data"][0]["embedding"], dtype=self._dtype)
         except (KeyError, IndexError):
             raise NIMClientError(f"Unexpected embedding response format: {response}")
         
+        if self._cache is not None:
+            self._cache.put(cache_model, text, embedding)
         return EmbeddingResponse(embedding=embedding, raw_response=response)
     
+    def embed_text(self, text: str) -> EmbeddingResponse:
+        """
+        Generate embedding for a text string.
+        
+        Args:
+            text: Input text to embed
+            
+        Returns:
+            EmbeddingResponse with embedding vector
+        """
+        return self._embed_cached(text, "passage")
+    
     def embed_query(self, query: str) -> EmbeddingResponse:
         """
         Generate embedding for a query (for search).
@@ -182,56 +365,91 @@ class EmbeddingClient(BaseNIMClient):
         Returns:
             EmbeddingResponse with embedding vector
         """
+        return self._embed_cached(query, "query")
+    
+    def _request_embeddings(self, texts: List[str], input_type: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Embed one server-sized batch of texts; returns (N, D) vectors and the raw response."""
         payload = {
             "model": self.model,
-            "input": query,
-            "input_type": "query"
+            "input": texts,
+            "input_type": input_type
         }
         
         response = self._make_request("embeddings", payload)
         
         try:
-            embedding = response["data"][0]["embedding"]
+            embeddings = np.asarray([item["embedding"] for item in response["data"]], dtype=self._dtype)
         except (KeyError, IndexError):
             raise NIMClientError(f"Unexpected embedding response format: {response}")
-        
-        return EmbeddingResponse(embedding=embedding, raw_response=response)
+        return embeddings, response
     
-    def embed_batch(self, texts: List[str], input_type: str = "passage") -> List[EmbeddingResponse]:
+    def embed_batch(
+        self,
+        texts: List[str],
+        input_type: str = "passage",
+        chunk_size: int = MAX_EMBED_BATCH
+    ) -> List[EmbeddingResponse]:
         """
         Generate embeddings for multiple texts.
         
+        Uncached texts are split into requests of at most chunk_size (the
+        server's batch limit) that are sent concurrently.
+        
         Args:
             texts: List of input texts
             input_type: 'passage' or 'query'
+            chunk_size: Maximum number of texts per request
             
         Returns:
-            List of EmbeddingResponse objects
+            List of EmbeddingResponse objects in input order
         """
-        payload = {
-            "model": self.model,
-            "input": texts,
-            "input_type": input_type
-        }
+        cache_model = f"{self.model}|{input_type}"
+        results: List[Optional[EmbeddingResponse]] = [None] * len(texts)
+        misses = []
+        for i, text in enumerate(texts):
+            embedding = self._cache.get(cache_model, text) if self._cache is not None else None
+            if embedding is None:
+                misses.append(i)
+            else:
+                results[i] = EmbeddingResponse(embedding=embedding, raw_response={"cached": True})
         
-        response = self._make_request("embeddings", payload)
+        if not misses:
+            return results
         
-        try:
-            embeddings = [
-                EmbeddingResponse(embedding=item["embedding"], raw_response=response)
-                for item in response["data"]
-            ]
-        except (KeyError, IndexError):
-            raise NIMClientError(f"Unexpected embedding response format: {response}")
+        # Only the uncached texts go over the wire
+        chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+        responses = self._map_concurrent(
+            lambda chunk: self._request_embeddings([texts[i] for i in chunk], input_type),
+            chunks
+        )
+        
+        for chunk, (embeddings, response) in zip(chunks, responses):
+            for i, embedding in zip(chunk, embeddings):
+                results[i] = EmbeddingResponse(embedding=embedding, raw_response=response)
+                if self._cache is not None:
+                    self._cache.put(cache_model, texts[i], embedding)
+        
+        return results
+    
+    def embed_texts(self, texts: List[str], chunk_size: int = 64) -> List[EmbeddingResponse]:
+        """
+        Generate passage embeddings for many texts, one concurrent request per chunk.
         
-        return embeddings
+        Args:
+            texts: List of input texts
+            chunk_size: Maximum number of texts per request
+            
+        Returns:
+            List of EmbeddingResponse objects in input order
+        """
+        return self.embed_batch(texts, "passage", chunk_size)
 
 
 class LLMClient(BaseNIMClient):
     """Client for Llama LLM."""
     
-    def __init__(self, base_url: str, model: str = "meta/llama", api_key: str = "", timeout: int = 120):
-        super().__init__(base_url, model, api_key, timeout)
+    def __init__(self, base_url: str, model: str = "meta/llama", api_key: str = "", timeout: int = 120, session: Optional[requests.Session] = None):
+        super().__init__(base_url, model, api_key, timeout, session)
     
     def generate_answer(
         self,
@@ -312,32 +530,72 @@ Provide a focused, relevant answer based ONLY on the video content above."""
         return f"{minutes:02d}:{secs:02d}"
 
 
+def embed_isolating_failures(embedding_client, texts: List[str]) -> List[Optional[EmbeddingResponse]]:
+    """
+    Embed texts in one call; if it fails, retry each half separately.
+    
+    A text that fails on its own gets None, so one bad input costs one
+    result instead of its whole batch. When the endpoint itself is down
+    (NIMUnavailableError) nothing is split: the whole call's texts get None
+    rather than turning an outage into 2N-1 failing requests.
+    
+    Args:
+        embedding_client: Any client with embed_texts(texts)
+        texts: Input texts
+        
+    Returns:
+        One EmbeddingResponse (or None) per text, in input order
+    """
+    if not texts:
+        return []
+    try:
+        return list(embedding_client.embed_texts(texts))
+    except Exception as e:
+        if len(texts) == 1 or isinstance(e, NIMUnavailableError):
+            logger.warning(f"Embedding failed for {len(texts)} texts: {e}")
+            return [None] * len(texts)
+        mid = len(texts) // 2
+        return (
+            embed_isolating_failures(embedding_client, texts[:mid])
+            + embed_isolating_failures(embedding_client, texts[mid:])
+        )
+
+
 class NIMClientFactory:
     """Factory for creating NIM clients from config."""
     
     @staticmethod
-    def create_vlm_client(config) -> VLMClient:
+    def create_vlm_client(config, session: Optional[requests.Session] = None) -> VLMClient:
         return VLMClient(
             base_url=config.nim.vlm_url,
             model=config.nim.vlm_model,
             api_key=config.nim.api_key,
-            timeout=config.nim.timeout
+            timeout=config.nim.timeout,
+            session=session,
+            max_side=config.nim.vlm_max_side
         )
     
     @staticmethod
-    def create_embedding_client(config) -> EmbeddingClient:
+    def create_embedding_client(config, session: Optional[requests.Session] = None) -> EmbeddingClient:
         return EmbeddingClient(
             base_url=config.nim.embedding_url,
             model=config.nim.embedding_model,
             api_key=config.nim.api_key,
-            timeout=config.nim.timeout
+            timeout=config.nim.timeout,
+            session=session,
+            dtype=config.milvus.vector_dtype,
+            cache_path=(
+                os.path.join(config.milvus.embedding_cache_dir, "nim_embeddings.npy")
+                if config.milvus.embedding_cache_dir else None
+            )
         )
     
     @staticmethod
-    def create_llm_client(config) -> LLMClient:
+    def create_llm_client(config, session: Optional[requests.Session] = None) -> LLMClient:
         return LLMClient(
             base_url=config.nim.llm_url,
             model=config.nim.llm_model,
             api_key=config.nim.api_key,
-            timeout=config.nim.timeout
+            timeout=config.nim.timeout,
+            session=session
         )
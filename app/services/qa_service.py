@@ -1,16 +1,25 @@
 """Q&A service for video content retrieval and answer generation."""
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import asyncio
 from dataclasses import dataclass
 
-from .nim_client import VLMClient, EmbeddingClient, LLMClient, NIMClientError
+import numpy as np
+
+from .nim_client import VLMClient, EmbeddingClient, LLMClient, NIMClientError, embed_isolating_failures
 from .vector_store import VectorStore, SearchResult
 from .video_processor import VideoProcessor, FrameData, VideoLibrary
+from .embedding_cache import EmbeddingCache
+from .semantic_cache import SemanticCache
+from .vlm_batcher import VLMBatcher
 from ..models.schemas import ProcessingProgress, ProcessingStatus, TimestampSource, AnswerResponse
 
 logger = logging.getLogger(__name__)
 
+# Max items buffered between processing pipeline stages
+PIPELINE_QUEUE_SIZE = 16
+
 
 @dataclass
 class ProcessingResult:
@@ -36,7 +45,12 @@ class VideoQAService:
         llm_client: LLMClient,
         vector_store: VectorStore,
         video_processor: VideoProcessor,
-        video_library: VideoLibrary
+        video_library: VideoLibrary,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        embed_batch_size: int = 32,
+        vlm_batch_size: int = 1,
+        vlm_batch_max: int = 8
     ):
         """
         Initialize Q&A service.
@@ -48,6 +62,11 @@ class VideoQAService:
             vector_store: Vector database
             video_processor: Video frame extractor
             video_library: Video file manager
+            embedding_cache: Optional cache for query embeddings
+            semantic_cache: Optional cache of global search results for similar queries
+            embed_batch_size: Frame descriptions embedded per request during processing
+            vlm_batch_size: Frames each video submits to the VLM at a time
+            vlm_batch_max: Frames coalesced (across videos) into one describe_frames call
         """
         self.vlm = vlm_client
         self.embedding = embedding_client
@@ -55,6 +74,14 @@ class VideoQAService:
         self.vector_store = vector_store
         self.processor = video_processor
         self.library = video_library
+        self.embedding_cache = embedding_cache
+        self.semantic_cache = semantic_cache
+        self.embed_batch_size = embed_batch_size
+        self.vlm_batch_size = vlm_batch_size
+        self.vlm_batcher = (
+            VLMBatcher(vlm_client, b_max=vlm_batch_max)
+            if hasattr(vlm_client, "describe_frames") else None
+        )
         
         self._processing_tasks: Dict[str, asyncio.Task] = {}
     
@@ -104,56 +131,102 @@ class VideoQAService:
             # Delete any existing descriptions for this video
             self.vector_store.delete_video_descriptions(video_id)
             
+            # Three-stage pipeline with bounded queues for backpressure:
+            # VLM captioning -> batched embedding -> Milvus writes.
+            # Embedding and inserts overlap with captioning of the next frames.
             processed_count = 0
-            batch_descriptions = []
-            batch_size = 5  # Process in batches
+            described_count = 0
+            captions: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+            embedded: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
             
-            # Extract and process frames
-            for frame_data in self.processor.extract_frames(video_path):
-                try:
-                    # Get VLM description
-                    vlm_response = self.vlm.describe_frame(frame_data.image)
-                    description = vlm_response.description
-                    
-                    # Get embedding
-                    embed_response = self.embedding.embed_text(description)
-                    embedding = embed_response.embedding
+            async def caption_worker():
+                """Decode sampled frames and describe them with the VLM."""
+                nonlocal described_count
+                frames = self.processor.extract_frames(video_path)
+                done = False
+                while not done:
+                    batch = []
+                    while len(batch) < self.vlm_batch_size:
+                        frame_data = await asyncio.to_thread(next, frames, None)
+                        if frame_data is None:
+                            done = True
+                            break
+                        batch.append(frame_data)
+                    if not batch:
+                        break
                     
-                    batch_descriptions.append({
-                        "timestamp": frame_data.timestamp,
-                        "description": description,
-                        "embedding": embedding
-                    })
+                    try:
+                        if self.vlm_batcher is not None:
+                            # Shares describe_frames calls with other videos being processed
+                            vlm_responses = await asyncio.gather(
+                                *(self.vlm_batcher.submit(f.image) for f in batch)
+                            )
+                        else:
+                            # Per-frame calls still overlap their round-trips
+                            vlm_responses = await asyncio.gather(
+                                *(asyncio.to_thread(self.vlm.describe_frame, f.image) for f in batch)
+                            )
+                    except NIMClientError as e:
+                        logger.warning(f"Error processing frames {batch[0].frame_number}-{batch[-1].frame_number}: {e}")
+                        continue
                     
-                    processed_count += 1
+                    for frame_data, vlm_response in zip(batch, vlm_responses):
+                        await captions.put((frame_data.timestamp, vlm_response.description))
+                    described_count += len(batch)
                     
-                    # Insert batch when full
-                    if len(batch_descriptions) >= batch_size:
-                        self.vector_store.insert_descriptions(video_id, batch_descriptions)
-                        batch_descriptions = []
-                    
-                    # Report progress
+                    # Report progress once per batch
                     if progress_callback:
+                        last = batch[-1]
                         progress = ProcessingProgress(
                             video_id=video_id,
                             status=ProcessingStatus.PROCESSING,
-                            current_frame=processed_count,
+                            current_frame=described_count,
                             total_frames=total_frames,
-                            current_timestamp=frame_data.timestamp,
-                            message=f"Processed frame at {self._format_timestamp(frame_data.timestamp)}"
+                            current_timestamp=last.timestamp,
+                            message=f"Processed frame at {self._format_timestamp(last.timestamp)}"
                         )
                         progress_callback(progress)
-                    
-                    # Yield control for async
-                    await asyncio.sleep(0)
-                    
-                except NIMClientError as e:
-                    logger.warning(f"Error processing frame {frame_data.frame_number}: {e}")
-                    continue
+                await captions.put(None)
+            
+            async def embed_worker():
+                """Embed descriptions in batches of embed_batch_size."""
+                pending = []
+                seen: Dict[bytes, np.ndarray] = {}  # description hash -> embedding
+                while True:
+                    item = await captions.get()
+                    if item is not None:
+                        pending.append(item)
+                    if pending and (item is None or len(pending) >= self.embed_batch_size):
+                        batch = await asyncio.to_thread(self._embed_batch, pending, seen)
+                        pending = []
+                        if batch is not None:
+                            await embedded.put(batch)
+                    if item is None:
+                        break
+                await embedded.put(None)
             
-            # Insert remaining batch
-            if batch_descriptions:
-                self.vector_store.insert_descriptions(video_id, batch_descriptions)
+            async def store_worker():
+                """Insert embedded batches into the vector store."""
+                nonlocal processed_count
+                while True:
+                    batch = await embedded.get()
+                    if batch is None:
+                        break
+                    processed_count += await asyncio.to_thread(
+                        self.vector_store.insert_columns, video_id, *batch
+                    )
+            
+            stages = [
+                asyncio.create_task(caption_worker()),
+                asyncio.create_task(embed_worker()),
+                asyncio.create_task(store_worker())
+            ]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                # A failed stage must not leave the others blocked on a queue
+                for task in stages:
+                    task.cancel()
             
             # === AUDIO TRANSCRIPTION ===
             try:
@@ -170,33 +243,26 @@ class VideoQAService:
                         )
                         progress_callback(progress)
                     
-                    transcriber = get_audio_transcriber()
-                    segments = transcriber.transcribe_segments(video_path, segment_duration=10.0)
+                    # Model load (first use) and a full Whisper pass both block for
+                    # seconds to minutes; keep them off the event loop
+                    transcriber = await asyncio.to_thread(get_audio_transcriber)
+                    segments = await asyncio.to_thread(
+                        transcriber.transcribe_segments, video_path, segment_duration=10.0
+                    )
+                    # Drop empty segments up front (isspace doesn't allocate like strip)
+                    segments = [s for s in segments if s.text and not s.text.isspace()]
                     
-                    # Store transcription segments
-                    audio_descriptions = []
-                    for seg in segments:
-                        if not seg.text.strip():
-                            continue
-                        
-                        # Prefix with [AUDIO] for clarity
-                        description = f"[AUDIO] {seg.text}"
-                        
-                        try:
-                            embed_response = self.embedding.embed_text(description)
-                            audio_descriptions.append({
-                                "timestamp": seg.start,
-                                "description": description,
-                                "embedding": embed_response.embedding,
-                                "source_type": "audio"
-                            })
-                        except NIMClientError as e:
-                            logger.warning(f"Error embedding audio segment: {e}")
-                            continue
+                    # Store transcription segments, prefixed with [AUDIO] for clarity
+                    texts = [(seg.start, f"[AUDIO] {seg.text}") for seg in segments]
+                    # One batched embedding pass off the event loop, with the same
+                    # duplicate-text reuse and error handling as frame descriptions
+                    audio_batch = await asyncio.to_thread(self._embed_batch, texts)
                     
-                    if audio_descriptions:
-                        self.vector_store.insert_descriptions(video_id, audio_descriptions)
-                        logger.info(f"Added {len(audio_descriptions)} audio segments for {video_id}")
+                    if audio_batch is not None:
+                        count = await asyncio.to_thread(self.vector_store.insert_columns, video_id, *audio_batch)
+                        logger.info(f"Added {count} of {len(texts)} audio segments for {video_id}")
+                    elif texts:
+                        logger.warning(f"No audio segments could be embedded for {video_id}")
                     
                     await asyncio.sleep(0)
             except ImportError:
@@ -209,6 +275,7 @@ class VideoQAService:
                 "status": "completed",
                 "processed_frames": processed_count
             })
+            self.invalidate_search_cache()
             
             # Final progress update
             if progress_callback:
@@ -249,6 +316,65 @@ class VideoQAService:
                 error=str(e)
             )
     
+    def _embed_batch(
+        self,
+        pending: List[tuple],
+        seen: Optional[Dict[bytes, np.ndarray]] = None
+    ) -> Optional[Tuple[List[float], List[str], np.ndarray]]:
+        """
+        Embed a batch of frame descriptions in one request.
+        
+        Descriptions already embedded for this video (consecutive frames of a
+        static scene often get identical captions) reuse the earlier vector.
+        
+        Args:
+            pending: List of (timestamp, description) tuples
+            seen: Per-video map of description hash -> embedding, updated in place
+            
+        Returns:
+            (timestamps, descriptions, (N, D) embeddings) columns ready for
+            insert_columns, or None if nothing in the batch could be embedded.
+            A failed request is retried in halves, so only descriptions that
+            fail on their own are left out.
+        """
+        if not pending:
+            return None
+        if seen is None:
+            seen = {}
+        
+        keys = [hashlib.blake2b(d.encode(), digest_size=8).digest() for _, d in pending]
+        
+        # Embed each new description once, even if repeated within the batch
+        to_embed: Dict[bytes, str] = {}
+        for key, (_, description) in zip(keys, pending):
+            if key not in seen and key not in to_embed:
+                to_embed[key] = description
+        
+        if to_embed:
+            embed_responses = embed_isolating_failures(self.embedding, list(to_embed.values()))
+            for key, embed_response in zip(to_embed, embed_responses):
+                if embed_response is not None:
+                    seen[key] = embed_response.embedding
+        
+        reused = len(pending) - len(to_embed)
+        if reused:
+            logger.debug(f"Reused embeddings for {reused} duplicate descriptions")
+        
+        # Every frame keeps its own row so each timestamp stays searchable
+        rows = [(key, item) for key, item in zip(keys, pending) if key in seen]
+        dropped = len(pending) - len(rows)
+        if dropped:
+            logger.warning(f"Dropped {dropped} of {len(pending)} descriptions that failed to embed")
+        if not rows:
+            return None
+        
+        # Embeddings go out as one contiguous block rather than per-row objects
+        return (
+            [timestamp for _, (timestamp, _) in rows],
+            [description for _, (_, description) in rows],
+            np.stack([seen[key] for key, _ in rows])
+        )
+    
     def ask_question(
         self,
         video_id: str,
@@ -268,7 +394,7 @@ class VideoQAService:
         """
         # Embed the query
         try:
-            query_embedding = self.embedding.embed_query(question).embedding
+            query_embedding = self._embed_query(question)
         except NIMClientError as e:
             logger.error(f"Error embedding query: {e}")
             return AnswerResponse(
@@ -312,7 +438,7 @@ class VideoQAService:
         
         # Format sources
         sources = [
-            TimestampSource(
+            TimestampSource.from_trusted(
                 timestamp=r.timestamp,
                 description=r.description,
                 relevance_score=r.score
@@ -327,6 +453,23 @@ class VideoQAService:
             question=question
         )
     
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query, going through the query-embedding cache if set."""
+        if self.embedding_cache is None:
+            return self.embedding.embed_query(query).embedding
+        
+        model = getattr(self.embedding, "model", type(self.embedding).__name__)
+        embedding = self.embedding_cache.get(model, query)
+        if embedding is None:
+            embedding = self.embedding.embed_query(query).embedding
+            self.embedding_cache.put(model, query, embedding)
+        return embedding
+    
+    def invalidate_search_cache(self):
+        """Drop cached global search results after the indexed content changes."""
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+    
     def get_processing_status(self, video_id: str) -> Optional[ProcessingProgress]:
         """Get current processing status for a video."""
         video_info = self.library.get_video(video_id)
@@ -355,36 +498,17 @@ class VideoQAService:
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
     
-    def global_search(
-        self,
-        query: str,
-        top_k: int = 20,
-        generate_answer: bool = True
-    ) -> Dict[str, Any]:
+    def _global_retrieve(self, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
         """
-        Search across ALL videos in the database.
+        Search all videos and return deduplicated hits enriched with video metadata.
         
         Args:
-            query: Search query
+            query_embedding: Query embedding
             top_k: Number of results to return
-            generate_answer: Whether to generate an AI summary
             
         Returns:
-            Dict with results and optional AI-generated answer
+            Result dicts, best match per video time window first
         """
-        # Embed the query
-        try:
-            query_embedding = self.embedding.embed_query(query).embedding
-        except NIMClientError as e:
-            logger.error(f"Error embedding query: {e}")
-            return {
-                "query": query,
-                "results": [],
-                "total_results": 0,
-                "answer": None,
-                "error": str(e)
-            }
-        
         # Search across ALL videos (no video_id filter)
         # Fetch more results for deduplication headroom
         search_results = self.vector_store.search(
@@ -394,37 +518,40 @@ class VideoQAService:
         )
         
         if not search_results:
-            return {
-                "query": query,
-                "results": [],
-                "total_results": 0,
-                "answer": "No matching content found in any processed videos."
-            }
+            return []
         
         # === DEDUPLICATION ===
         # Group results from same video within time window (30 seconds)
         # Keep only the best match per time window
         TIME_WINDOW = 30.0  # seconds
         
-        deduplicated = []
-        seen_windows = {}  # (video_id, window_index) -> best result
-        
-        for r in search_results:
-            window_idx = int(r.timestamp // TIME_WINDOW)
-            key = (r.video_id, window_idx)
-            
-            if key not in seen_windows:
-                seen_windows[key] = r
-                deduplicated.append(r)
-            # Keep the one with higher score (earlier results have higher scores from vector search)
+        n = len(search_results)
+        scores = np.fromiter((r.score for r in search_results), dtype=np.float64, count=n)
+        windows = (
+            np.fromiter((r.timestamp for r in search_results), dtype=np.float64, count=n) // TIME_WINDOW
+        ).astype(np.int64)
+        video_index: Dict[str, int] = {}
+        videos = np.fromiter(
+            (video_index.setdefault(r.video_id, len(video_index)) for r in search_results),
+            dtype=np.int64, count=n
+        )
+        # One integer key per (video_id, window_index)
+        keys = videos * (int(windows.max()) + 1) + windows
         
-        # Limit to top_k after deduplication
-        deduplicated = deduplicated[:top_k]
+        # Best first; np.unique's first index per key is then that window's best hit
+        order = np.argsort(-scores, kind="stable")
+        _, first = np.unique(keys[order], return_index=True)
+        kept = order[np.sort(first)][:top_k]
+        deduplicated = [search_results[i] for i in kept]
         
-        # Enrich results with video metadata
+        # Enrich results with video metadata, looking each video up once
+        video_infos = {
+            video_id: self.library.get_video(video_id)
+            for video_id in {r.video_id for r in deduplicated}
+        }
         enriched_results = []
         for r in deduplicated:
-            video_info = self.library.get_video(r.video_id)
+            video_info = video_infos[r.video_id]
             video_name = video_info.get("name", r.video_id) if video_info else r.video_id
             
             enriched_results.append({
@@ -436,6 +563,56 @@ class VideoQAService:
                 "thumbnail_url": f"/api/videos/{r.video_id}/thumbnail" if video_info else None
             })
         
+        return enriched_results
+    
+    def global_search(
+        self,
+        query: str,
+        top_k: int = 20,
+        generate_answer: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Search across ALL videos in the database.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            generate_answer: Whether to generate an AI summary
+            
+        Returns:
+            Dict with results and optional AI-generated answer
+        """
+        # Embed the query
+        try:
+            query_embedding = self._embed_query(query)
+        except NIMClientError as e:
+            logger.error(f"Error embedding query: {e}")
+            return {
+                "query": query,
+                "results": [],
+                "total_results": 0,
+                "answer": None,
+                "error": str(e)
+            }
+        
+        # Reuse retrieval from a near-duplicate recent query, skipping Milvus.
+        # Only the results are shared; the answer is generated for this exact question.
+        enriched_results = None
+        if self.semantic_cache is not None:
+            enriched_results = self.semantic_cache.get(query_embedding, top_k)
+        if enriched_results is None:
+            enriched_results = self._global_retrieve(query_embedding, top_k)
+            if self.semantic_cache is not None and enriched_results:
+                self.semantic_cache.put(query_embedding, enriched_results, top_k)
+        
+        if not enriched_results:
+            return {
+                "query": query,
+                "results": [],
+                "total_results": 0,
+                "answer": "No matching content found in any processed videos."
+            }
+        
         # Generate AI summary if requested
         answer = None
         if generate_answer and enriched_results:
@@ -3,6 +3,7 @@ import torch
 import numpy as np
 from typing import Optional, List, Tuple
 import logging
+import threading
 import cv2
 from dataclasses import dataclass
 from PIL import Image
@@ -28,6 +29,8 @@ class SAM2Tracker:
     _instance: Optional['SAM2Tracker'] = None
     _model = None
     _processor = None
+    # Segmentation routes run in the threadpool; the model is shared and not thread-safe
+    _inference_lock = threading.Lock()
     
     def __new__(cls):
         """Singleton pattern."""
@@ -99,27 +102,28 @@ class SAM2Tracker:
             # Prepare image for SAM2
             pil_image = Image.fromarray(frame)
             
-            # Process with SAM2
-            inputs = self._processor(
-                images=pil_image,
-                input_points=[[[px, py]]],
-                return_tensors="pt"
-            )
-            
-            if torch.cuda.is_available():
-                inputs = {k: v.to("cuda") if hasattr(v, 'to') else v for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self._model(**inputs)
-            
-            # Get mask
-            masks = self._processor.post_process_masks(
-                outputs.pred_masks,
-                inputs["original_sizes"],
-                inputs["reshaped_input_sizes"]
-            )
-            
-            mask = masks[0][0][0].cpu().numpy()  # Best mask
+            with self._inference_lock:
+                # Process with SAM2
+                inputs = self._processor(
+                    images=pil_image,
+                    input_points=[[[px, py]]],
+                    return_tensors="pt"
+                )
+                
+                if torch.cuda.is_available():
+                    inputs = {k: v.to("cuda") if hasattr(v, 'to') else v for k, v in inputs.items()}
+                
+                with torch.no_grad():
+                    outputs = self._model(**inputs)
+                
+                # Get mask
+                masks = self._processor.post_process_masks(
+                    outputs.pred_masks,
+                    inputs["original_sizes"],
+                    inputs["reshaped_input_sizes"]
+                )
+                
+                mask = masks[0][0][0].cpu().numpy()  # Best mask
             
         except Exception as e:
             logger.warning(f"SAM2 segmentation failed: {e}, using fallback")
@@ -0,0 +1,96 @@
+"""Semantic cache: reuse search results for near-duplicate queries."""
+import threading
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Cache of search results keyed by query embedding.
+    
+    A lookup hits when a cached query's cosine similarity to the new query
+    is at least 1 - tau. Embeddings are normalized at insert, so scoring is
+    a single matrix-vector product. The least recently used entry is
+    evicted when full.
+    """
+    
+    def __init__(self, maxsize: int = 512, tau: float = 0.05):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of cached queries
+            tau: Maximum cosine distance for a cache hit
+        """
+        self.maxsize = maxsize
+        self.tau = tau
+        self._keys: Optional[np.ndarray] = None  # (maxsize, dim) unit vectors
+        self._params: List[Hashable] = []
+        self._payloads: List[Any] = []
+        self._last_used = np.zeros(maxsize, dtype=np.int64)
+        self._tick = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Convert an embedding to a unit-norm float32 vector."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+    
+    def get(self, embedding, params: Hashable = None) -> Optional[Any]:
+        """
+        Look up results for a query embedding.
+        
+        Args:
+            embedding: Query embedding
+            params: Other search parameters that must match exactly (e.g. top_k)
+        
+        Returns:
+            Cached payload, or None on a miss
+        """
+        with self._lock:
+            size = len(self._payloads)
+            if size == 0:
+                return None
+            
+            scores = self._keys[:size] @ self._normalize(embedding)
+            # Only consider entries searched with the same parameters
+            for idx in np.argsort(-scores):
+                if scores[idx] < 1.0 - self.tau:
+                    return None
+                if self._params[idx] == params:
+                    self._tick += 1
+                    self._last_used[idx] = self._tick
+                    return self._payloads[idx]
+            return None
+    
+    def put(self, embedding, payload: Any, params: Hashable = None):
+        """Cache a payload for a query embedding."""
+        vec = self._normalize(embedding)
+        with self._lock:
+            if self._keys is None or self._keys.shape[1] != vec.shape[0]:
+                self._keys = np.zeros((self.maxsize, vec.shape[0]), dtype=np.float32)
+                self._params.clear()
+                self._payloads.clear()
+            
+            if len(self._payloads) < self.maxsize:
+                idx = len(self._payloads)
+                self._params.append(params)
+                self._payloads.append(payload)
+            else:
+                idx = int(np.argmin(self._last_used))
+                self._params[idx] = params
+                self._payloads[idx] = payload
+            
+            self._keys[idx] = vec
+            self._tick += 1
+            self._last_used[idx] = self._tick
+    
+    def clear(self):
+        """Drop all entries (e.g. after the indexed content changes)."""
+        with self._lock:
+            self._params.clear()
+            self._payloads.clear()
+            self._last_used[:] = 0
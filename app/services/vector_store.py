@@ -1,7 +1,8 @@
 """Milvus Lite vector database handler for video descriptions."""
 from pymilvus import MilvusClient, DataType
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+import numpy as np
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -25,7 +26,11 @@ class VectorStore:
         self,
         db_path: str = "./data/milvus/video_qa.db",
         collection_name: str = "video_descriptions",
-        embedding_dim: int = 1024
+        embedding_dim: int = 1024,
+        vector_dtype: str = "float32",
+        index_type: str = "FLAT",
+        index_params: Optional[Dict[str, Any]] = None,
+        search_params: Optional[Dict[str, Any]] = None
     ):
         """
         Initialize vector store.
@@ -34,27 +39,107 @@ class VectorStore:
             db_path: Path to Milvus Lite database file
             collection_name: Name of the collection
             embedding_dim: Dimension of embedding vectors
+            vector_dtype: "float32" or "float16" storage for vectors
+            index_type: Milvus index type (e.g. FLAT, HNSW)
+            index_params: Build parameters for the index (e.g. M, efConstruction for HNSW)
+            search_params: Search parameters (e.g. ef for HNSW)
         """
         self.db_path = db_path
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        self.vector_dtype = vector_dtype
+        self.index_type = index_type
+        # FLAT is an exact scan and takes no build/search parameters
+        self.index_params = (index_params or {}) if index_type != "FLAT" else {}
+        self.search_params = (search_params or {}) if index_type != "FLAT" else {}
+        self._np_dtype = np.float16 if vector_dtype == "float16" else None
         self.client = MilvusClient(db_path)
         
         self._ensure_collection()
     
     def _ensure_collection(self):
-        """Create collection if it doesn't exist."""
+        """Create collection if it doesn't exist, and its vector index if missing."""
         if not self.client.has_collection(self.collection_name):
             logger.info(f"Creating collection: {self.collection_name}")
-            
-            self.client.create_collection(
+            self._create_collection()
+            logger.info(f"Collection created: {self.collection_name}")
+        elif not self.client.list_indexes(collection_name=self.collection_name):
+            logger.info(f"Building {self.index_type} index on {self.collection_name}")
+            self.client.release_collection(collection_name=self.collection_name)
+            self.client.create_index(
                 collection_name=self.collection_name,
-                dimension=self.embedding_dim,
-                metric_type="COSINE",
-                auto_id=True
+                index_params=self._prepare_index_params()
             )
-            
-            logger.info(f"Collection created: {self.collection_name}")
+            self.client.load_collection(collection_name=self.collection_name)
+    
+    def _prepare_index_params(self):
+        """Index definition for the vector field."""
+        index_params = self.client.prepare_index_params()
+        index_params.add_index(
+            field_name="vector",
+            index_type=self.index_type,
+            metric_type="COSINE",
+            params=self.index_params
+        )
+        return index_params
+    
+    def _create_collection(self):
+        """Create the collection (same layout as quick setup) with the configured index."""
+        vector_type = DataType.FLOAT16_VECTOR if self.vector_dtype == "float16" else DataType.FLOAT_VECTOR
+        
+        schema = self.client.create_schema(auto_id=True, enable_dynamic_field=True)
+        schema.add_field("id", DataType.INT64, is_primary=True)
+        schema.add_field("vector", vector_type, dim=self.embedding_dim)
+        
+        self.client.create_collection(
+            collection_name=self.collection_name,
+            schema=schema,
+            index_params=self._prepare_index_params()
+        )
+    
+    def _to_vectors(self, embeddings: List[Any]) -> List[Any]:
+        """Cast a batch of embeddings to the vector dtype in one numpy conversion."""
+        if self._np_dtype is None:
+            return embeddings
+        return list(np.asarray(embeddings).astype(self._np_dtype, copy=False))
+    
+    def _to_records(
+        self,
+        video_ids: List[str],
+        descriptions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Convert description dicts to Milvus records, casting all vectors at once."""
+        return self._columns_to_records(
+            video_ids,
+            [desc["timestamp"] for desc in descriptions],
+            [desc["description"] for desc in descriptions],
+            [desc["embedding"] for desc in descriptions]
+        )
+    
+    def _columns_to_records(
+        self,
+        video_ids: List[str],
+        timestamps: List[float],
+        descriptions: List[str],
+        embeddings: Any
+    ) -> List[Dict[str, Any]]:
+        """Zip column data into Milvus records (MilvusClient.insert takes rows)."""
+        vectors = self._to_vectors(embeddings)
+        return [
+            {
+                "video_id": video_id,
+                "timestamp": float(timestamp),
+                "description": description,
+                "vector": vector
+            }
+            for video_id, timestamp, description, vector in zip(video_ids, timestamps, descriptions, vectors)
+        ]
+    
+    def _to_vector(self, embedding):
+        """Cast an embedding to the collection's vector dtype."""
+        if self._np_dtype is None:
+            return embedding
+        return np.asarray(embedding).astype(self._np_dtype, copy=False)
     
     def insert_descriptions(
         self,
@@ -74,16 +159,42 @@ class VectorStore:
         if not descriptions:
             return 0
         
-        data = []
-        for desc in descriptions:
-            data.append({
-                "video_id": video_id,
-                "timestamp": float(desc["timestamp"]),
-                "description": desc["description"],
-                "vector": desc["embedding"]
-            })
+        # One multi-row insert per call; vectors are cast as a single array
+        data = self._to_records([video_id] * len(descriptions), descriptions)
+        
+        self.client.insert(
+            collection_name=self.collection_name,
+            data=data
+        )
+        
+        logger.info(f"Inserted {len(data)} descriptions for video {video_id}")
+        return len(data)
+    
+    def insert_columns(
+        self,
+        video_id: str,
+        timestamps: List[float],
+        descriptions: List[str],
+        embeddings: np.ndarray
+    ) -> int:
+        """
+        Insert frame descriptions given as parallel columns.
         
-        result = self.client.insert(
+        Args:
+            video_id: Video identifier
+            timestamps: Timestamp of each description
+            descriptions: Description texts
+            embeddings: (N, D) array of embeddings, one row per description
+            
+        Returns:
+            Number of inserted records
+        """
+        if not descriptions:
+            return 0
+        
+        data = self._columns_to_records([video_id] * len(descriptions), timestamps, descriptions, embeddings)
+        
+        self.client.insert(
             collection_name=self.collection_name,
             data=data
         )
@@ -91,6 +202,36 @@ class VectorStore:
         logger.info(f"Inserted {len(data)} descriptions for video {video_id}")
         return len(data)
     
+    def bulk_insert(
+        self,
+        rows: List[Tuple[str, Dict[str, Any]]],
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Insert descriptions for many videos in large batches, then flush once.
+        
+        Args:
+            rows: List of (video_id, description dict) tuples
+            batch_size: Number of records per insert call
+            
+        Returns:
+            Number of inserted records
+        """
+        if not rows:
+            return 0
+        
+        for i in range(0, len(rows), batch_size):
+            chunk = rows[i:i + batch_size]
+            self.client.insert(
+                collection_name=self.collection_name,
+                data=self._to_records([vid for vid, _ in chunk], [desc for _, desc in chunk])
+            )
+        
+        self.client.flush(collection_name=self.collection_name)
+        
+        logger.info(f"Bulk inserted {len(rows)} descriptions")
+        return len(rows)
+    
     def search(
         self,
         query_embedding: List[float],
@@ -110,12 +251,18 @@ class VectorStore:
         """
         filter_expr = f'video_id == "{video_id}"' if video_id else None
         
+        params = self.search_params
+        if self.index_type == "HNSW":
+            # HNSW needs ef >= limit (Milvus rejects the search otherwise)
+            params = {**params, "ef": max(params.get("ef", 0), top_k)}
+        
         results = self.client.search(
             collection_name=self.collection_name,
-            data=[query_embedding],
+            data=[self._to_vector(query_embedding)],
             limit=top_k,
             filter=filter_expr,
-            output_fields=["video_id", "timestamp", "description"]
+            output_fields=["video_id", "timestamp", "description"],
+            search_params={"metric_type": "COSINE", "params": params}
         )
         
         search_results = []
@@ -2,10 +2,15 @@
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Generator, Tuple, Optional, Dict, Any
+from typing import Generator, List, Tuple, Optional, Dict, Any
 from dataclasses import dataclass
 import logging
 import json
+import orjson
+import sqlite3
+import threading
+import time
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -77,23 +82,58 @@ class VideoProcessor:
             raise ValueError(f"Could not open video: {video_path}")
         
         try:
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps if fps > 0 else 0
-            fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
-            codec = "".join([chr((fourcc >> 8 * i) & 0xFF) for i in range(4)])
+            return self._read_metadata(cap, video_path)
+        finally:
+            cap.release()
+    
+    @staticmethod
+    def _read_metadata(cap: cv2.VideoCapture, video_path: str) -> VideoMetadata:
+        """Read metadata from container headers of an open capture (no frame scan)."""
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        duration = total_frames / fps if fps > 0 else 0
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        codec = "".join([chr((fourcc >> 8 * i) & 0xFF) for i in range(4)])
+        
+        return VideoMetadata(
+            path=video_path,
+            width=width,
+            height=height,
+            fps=fps,
+            total_frames=total_frames,
+            duration=duration,
+            codec=codec
+        )
+    
+    def analyze(
+        self,
+        video_path: str,
+        thumbnail_path: str,
+        size: Tuple[int, int] = (320, 180),
+        timestamp: float = 1.0
+    ) -> VideoMetadata:
+        """
+        Read metadata and write a thumbnail with a single open of the video.
+        
+        Args:
+            video_path: Path to video file
+            thumbnail_path: Path to save thumbnail
+            size: Thumbnail size (width, height)
+            timestamp: Time in seconds to capture thumbnail
             
-            return VideoMetadata(
-                path=video_path,
-                width=width,
-                height=height,
-                fps=fps,
-                total_frames=total_frames,
-                duration=duration,
-                codec=codec
-            )
+        Returns:
+            VideoMetadata object
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        
+        try:
+            metadata = self._read_metadata(cap, video_path)
+            self._write_thumbnail(cap, metadata.fps, thumbnail_path, size, timestamp)
+            return metadata
         finally:
             cap.release()
     
@@ -199,57 +239,233 @@ class VideoProcessor:
         
         try:
             fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_number = int(timestamp * fps)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            
-            ret, frame = cap.read()
-            if not ret:
-                # Try first frame if timestamp fails
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret, frame = cap.read()
-            
-            if ret:
-                # Resize to thumbnail size
-                thumbnail = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
-                cv2.imwrite(output_path, thumbnail)
-                return output_path
-            else:
-                raise ValueError("Could not read frame for thumbnail")
+            return self._write_thumbnail(cap, fps, output_path, size, timestamp)
         finally:
             cap.release()
+    
+    @staticmethod
+    def _write_thumbnail(
+        cap: cv2.VideoCapture,
+        fps: float,
+        output_path: str,
+        size: Tuple[int, int],
+        timestamp: float
+    ) -> str:
+        """Grab the frame at timestamp (or the first frame) from an open capture and save it."""
+        frame_number = int(timestamp * fps)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        
+        ret, frame = cap.read()
+        if not ret:
+            # Try first frame if timestamp fails
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = cap.read()
+        
+        if ret:
+            # Resize to thumbnail size
+            thumbnail = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            cv2.imwrite(output_path, thumbnail)
+            return output_path
+        else:
+            raise ValueError("Could not read frame for thumbnail")
+
+
+# Docker mount point used when metadata was recorded inside the container
+DOCKER_VIDEOS_DIR = Path("/workspace/data/videos")
+
+# Cached directory listings (dir -> {filename: path}) and resolved paths
+_dir_listings: Dict[str, Dict[str, Path]] = {}
+_resolved_paths: Dict[str, Path] = {}
+
+
+def _list_dir(directory: Path, refresh: bool = False) -> Dict[str, Path]:
+    """Map file names to paths with a single cached directory listing."""
+    key = str(directory)
+    if refresh or key not in _dir_listings:
+        try:
+            with os.scandir(directory) as entries:
+                _dir_listings[key] = {e.name: Path(e.path) for e in entries if e.is_file()}
+        except OSError:
+            _dir_listings[key] = {}
+    return _dir_listings[key]
+
+
+def resolve_video_path(raw: str, videos_dir: Optional[Path] = None) -> Optional[Path]:
+    """
+    Resolve a recorded video path to an existing file.
+    
+    Tries the recorded path, then the Docker mount, then videos_dir, using cached
+    directory listings instead of per-path stat() calls. Only hits are cached, and a
+    miss rescans the listings once so newly added files are found.
+    
+    Args:
+        raw: Path as stored in the video metadata
+        videos_dir: Local videos directory to fall back to
+        
+    Returns:
+        Path to the existing file, or None if not found
+    """
+    if not raw:
+        return None
+    
+    cached = _resolved_paths.get(raw)
+    if cached is not None:
+        return cached
+    
+    recorded = Path(raw)
+    candidate_dirs = [recorded.parent, DOCKER_VIDEOS_DIR]
+    if videos_dir is not None:
+        candidate_dirs.append(Path(videos_dir))
+    
+    for refresh in (False, True):
+        for directory in candidate_dirs:
+            path = _list_dir(directory, refresh).get(recorded.name)
+            if path is not None:
+                _resolved_paths[raw] = path
+                return path
+    return None
 
 
 class VideoLibrary:
-    """Manages video files and their metadata."""
+    """
+    Manages video files and their metadata.
     
-    def __init__(self, videos_dir: str, metadata_file: str = "videos_metadata.json"):
+    Metadata is persisted in SQLite (one row per video, WAL mode) so each mutation
+    writes a single row. Reads are served from an in-memory copy.
+    """
+    
+    # Seconds between checks for writes made by other processes
+    EXTERNAL_CHECK_INTERVAL = 1.0
+    
+    def __init__(
+        self,
+        videos_dir: str,
+        metadata_file: str = "videos_metadata.json",
+        db_file: str = "videos.db"
+    ):
         """
         Initialize video library.
         
         Args:
             videos_dir: Directory containing video files
-            metadata_file: Name of metadata JSON file
+            metadata_file: Name of legacy metadata JSON file (imported into an empty database)
+            db_file: Name of SQLite metadata database
         """
         self.videos_dir = Path(videos_dir)
         self.metadata_file = self.videos_dir / metadata_file
+        self.db_file = self.videos_dir / db_file
         self.videos: Dict[str, Dict[str, Any]] = {}
+        
+        # Read caches, invalidated by bumping _version on every write
+        self._version = 0
+        self._list_cache: Optional[Tuple[int, list]] = None
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        
+        self._conn = self._connect()
         self._load_metadata()
+        
+        # Out-of-band writes (e.g. register_videos.py) are picked up at most once per interval
+        self._data_version = self._read_data_version()
+        self._last_check = time.monotonic()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the metadata database and create the table if needed."""
+        conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        # WAL lets readers proceed while a writer commits; NORMAL skips the
+        # per-commit fsync (still crash-safe in WAL, only the last commits can roll back)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS videos (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.commit()
+        return conn
     
     def _load_metadata(self):
-        """Load video metadata from file."""
-        if self.metadata_file.exists():
-            try:
-                with open(self.metadata_file, 'r') as f:
-                    self.videos = json.load(f)
-            except Exception as e:
-                logger.warning(f"Could not load metadata: {e}")
-                self.videos = {}
-    
-    def _save_metadata(self):
-        """Save video metadata to file."""
+        """Load video metadata from SQLite, bootstrapping from the legacy JSON file once."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM videos").fetchall()
+        
+        if not rows and self.metadata_file.exists():
+            self._import_json()
+            return
+        
+        # Build the new dict first; readers on other threads only ever see a complete one
+        videos = {video_id: orjson.loads(data) for video_id, data in rows}
+        with self._lock:
+            self.videos = videos
+            self._invalidate()
+    
+    def _import_json(self):
+        """One-time import of videos_metadata.json into an empty database."""
+        try:
+            with open(self.metadata_file, 'r') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load metadata: {e}")
+            return
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO videos (id, data) VALUES (?, ?)",
+                [(vid, self._dumps(v)) for vid, v in legacy.items()]
+            )
+            self._conn.commit()
+            self.videos = legacy
+            self._invalidate()
+        logger.info(f"Imported {len(legacy)} videos from {self.metadata_file.name}")
+    
+    def _read_data_version(self) -> int:
+        """SQLite's data_version changes only when another connection commits."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _check_external_writes(self):
+        """Reload if another process wrote the database since the last check."""
+        now = time.monotonic()
+        if now - self._last_check < self.EXTERNAL_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            logger.info("Video metadata changed on disk, reloading")
+            self.refresh()
+    
+    def _invalidate(self):
+        """Drop cached views after a mutation."""
+        self._version += 1
+        self._list_cache = None
+        self._resolved.clear()
+    
+    def refresh(self):
+        """Reload metadata from disk (e.g. after out-of-band edits)."""
+        self._load_metadata()
+    
+    @staticmethod
+    def _dumps(video: Dict[str, Any]) -> str:
+        """Serialize a metadata entry with orjson (datetimes and numpy scalars handled natively)."""
+        return orjson.dumps(video, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def _save_video(self, video_id: str):
+        """Persist a single video's metadata row."""
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.videos, f, indent=2, default=str)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO videos (id, data) VALUES (?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                    (video_id, self._dumps(self.videos[video_id]))
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Could not save metadata: {e}")
+    
+    def _delete_row(self, video_id: str):
+        """Remove a video's metadata row."""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+                self._conn.commit()
         except Exception as e:
             logger.error(f"Could not save metadata: {e}")
     
@@ -279,13 +495,18 @@ class VideoLibrary:
             **(metadata or {})
         }
         self.videos[video_id] = video_info
-        self._save_metadata()
+        self._invalidate()
+        self._save_video(video_id)
         return video_info
     
     def get_video(self, video_id: str) -> Optional[Dict[str, Any]]:
         """Get video info by ID."""
-        video = self.videos.get(video_id)
-        if video:
+        self._check_external_writes()
+        video = self._resolved.get(video_id)
+        if video is None:
+            video = self.videos.get(video_id)
+            if not video:
+                return video
             # Fix path to be relative to current videos_dir (handles Docker mount points)
             video = video.copy()
             filename = video.get("filename", "")
@@ -294,17 +515,87 @@ class VideoLibrary:
             if video.get("thumbnail"):
                 thumb_filename = Path(video["thumbnail"]).name
                 video["thumbnail"] = str(self.videos_dir / thumb_filename)
-        return video
+            self._resolved[video_id] = video
+        # Shallow copy so callers can't mutate the cached view
+        return video.copy()
+    
+    def has_video(self, video_id: str) -> bool:
+        """Check whether a video exists (in-memory lookup)."""
+        self._check_external_writes()
+        return video_id in self.videos
+    
+    def get_status(self, video_id: str) -> Optional[str]:
+        """Get a video's processing status without building its resolved view."""
+        self._check_external_writes()
+        video = self.videos.get(video_id)
+        return video.get("status") if video else None
+    
+    def find_by_hash(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Find a video by the SHA-256 of its file contents."""
+        for video_id, video in self.videos.items():
+            if video.get("sha256") == sha256:
+                return self.get_video(video_id)
+        return None
     
     def update_video(self, video_id: str, updates: Dict[str, Any]):
         """Update video metadata."""
         if video_id in self.videos:
             self.videos[video_id].update(updates)
-            self._save_metadata()
+            self._invalidate()
+            self._save_video(video_id)
+    
+    def claim_for_processing(self, video_id: str) -> bool:
+        """
+        Atomically move a video to "processing" unless it is already there.
+        
+        Args:
+            video_id: Video identifier
+            
+        Returns:
+            True if this caller claimed the video, False if it was already processing
+            
+        Raises:
+            KeyError: If the video is not in the library
+        """
+        with self._lock:
+            video = self.videos.get(video_id)
+            if video is None:
+                raise KeyError(video_id)
+            if video.get("status") == "processing":
+                return False
+            video["status"] = "processing"
+        self._invalidate()
+        self._save_video(video_id)
+        return True
+    
+    def reset_interrupted(self) -> List[str]:
+        """
+        Mark videos left in "processing" as "failed" so they can be queued again.
+        
+        The processing queue lives in memory, so at startup any such video was
+        claimed by a server that stopped before finishing it.
+        
+        Returns:
+            IDs of the videos that were reset
+        """
+        with self._lock:
+            stuck = [vid for vid, video in self.videos.items() if video.get("status") == "processing"]
+            for video_id in stuck:
+                self.videos[video_id]["status"] = "failed"
+        if stuck:
+            self._invalidate()
+            for video_id in stuck:
+                self._save_video(video_id)
+        return stuck
     
     def list_videos(self) -> list:
-        """List all videos in library."""
-        return list(self.videos.values())
+        """List all videos in library (cached until the next write; do not mutate)."""
+        self._check_external_writes()
+        cache = self._list_cache
+        if cache is None or cache[0] != self._version:
+            cache = (self._version, list(self.videos.values()))
+            self._list_cache = cache
+        return cache[1]
     
     def delete_video(self, video_id: str) -> bool:
         """Delete a video from library."""
@@ -312,7 +603,11 @@ class VideoLibrary:
             video_path = Path(self.videos[video_id].get("path", ""))
             if video_path.exists():
                 video_path.unlink()
+            # Forget resolved paths for the removed file
+            _resolved_paths.pop(str(video_path), None)
+            _resolved_paths.pop(str(self.videos_dir / self.videos[video_id].get("filename", "")), None)
             del self.videos[video_id]
-            self._save_metadata()
+            self._invalidate()
+            self._delete_row(video_id)
             return True
         return False
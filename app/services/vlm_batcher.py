@@ -0,0 +1,95 @@
+"""Micro-batching of VLM frame descriptions across concurrent callers."""
+import asyncio
+import logging
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VLMBatcher:
+    """
+    Coalesce describe requests into describe_frames() calls.
+    
+    Callers await submit() per frame. A dispatcher task collects requests
+    until b_max are queued or tau seconds pass after the first one, then
+    describes them with one client call (one batched generate() locally,
+    concurrent requests on NIM). Frames from videos processed in parallel
+    share batches.
+    """
+    
+    def __init__(self, client: Any, b_max: int = 8, tau: float = 0.015):
+        """
+        Initialize the batcher.
+        
+        Args:
+            client: VLM client with describe_frames(images)
+            b_max: Maximum frames per describe_frames call
+            tau: Seconds to wait for more frames after the first arrives
+        """
+        self.client = client
+        self.b_max = b_max
+        self.tau = tau
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def _ensure_dispatcher(self):
+        """Start the dispatcher on the running loop (again if it was stopped)."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._dispatch())
+    
+    async def submit(self, image: np.ndarray) -> Any:
+        """
+        Describe one frame as part of the next batch.
+        
+        Args:
+            image: RGB numpy array of the frame
+        
+        Returns:
+            The client's VLMResponse for this frame
+        """
+        self._ensure_dispatcher()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        """Wait for one request, then gather more until b_max or the tau deadline."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.tau
+        while len(batch) < self.b_max:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _dispatch(self):
+        """Describe queued frames batch by batch and resolve their futures."""
+        while True:
+            batch = await self._collect()
+            # Callers that were cancelled while queued need no work
+            batch = [(image, future) for image, future in batch if not future.done()]
+            if not batch:
+                continue
+            
+            try:
+                responses = await asyncio.to_thread(
+                    self.client.describe_frames, [image for image, _ in batch]
+                )
+            except Exception as e:
+                logger.warning(f"VLM batch of {len(batch)} frames failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
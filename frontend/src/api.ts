@@ -3,8 +3,12 @@ import type { Video, UploadResponse, QuestionResponse, ProcessingProgress, Globa
 const API_BASE = '/api';
 
 export const api = {
-    async fetchVideos(): Promise<{ videos: Video[] }> {
-        const res = await fetch(`${API_BASE}/videos`);
+    async fetchVideos(offset?: number, limit?: number): Promise<{ videos: Video[]; total: number }> {
+        const params = new URLSearchParams();
+        if (offset !== undefined) params.set('offset', String(offset));
+        if (limit !== undefined) params.set('limit', String(limit));
+        const query = params.toString();
+        const res = await fetch(`${API_BASE}/videos${query ? `?${query}` : ''}`);
         if (!res.ok) throw new Error('Failed to fetch videos');
         return res.json();
     },
@@ -1,12 +1,16 @@
 """Scan videos folder and register all unregistered videos in metadata."""
 import os
-import json
+import sys
 import uuid
 from pathlib import Path
 import cv2
 
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.video_processor import VideoLibrary
+
 VIDEOS_DIR = "/home/dell/Documents/hackathon/nirmal-hackathon/data/videos"
-METADATA_FILE = os.path.join(VIDEOS_DIR, "videos_metadata.json")
 
 def get_video_metadata(video_path: str) -> dict:
     """Extract metadata from video file."""
@@ -35,14 +39,10 @@ def generate_thumbnail(video_path: str, thumb_path: str):
 
 def main():
     # Load existing metadata
-    if os.path.exists(METADATA_FILE):
-        with open(METADATA_FILE, 'r') as f:
-            metadata = json.load(f)
-    else:
-        metadata = {}
+    library = VideoLibrary(VIDEOS_DIR)
     
     # Get existing filenames
-    registered_files = {v.get("filename") for v in metadata.values()}
+    registered_files = {v.get("filename") for v in library.list_videos()}
     
     # Scan for new videos
     added = 0
@@ -78,12 +78,7 @@ def main():
             name = '_'.join(name.split('_')[1:])
         
         # Register
-        metadata[video_id] = {
-            "id": video_id,
-            "filename": filename,
-            "path": video_path,
-            "status": "pending",
-            "processed_frames": 0,
+        library.add_video(video_id, filename, {
             "name": name,
             "duration": meta["duration"],
             "fps": meta["fps"],
@@ -91,16 +86,12 @@ def main():
             "height": meta["height"],
             "total_frames": meta["total_frames"],
             "thumbnail": thumb_path
-        }
+        })
         
         print(f"Registered: {name} ({video_id})")
         added += 1
     
-    # Save metadata
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
-    
-    print(f"\n✅ Added {added} videos. Total: {len(metadata)} videos in library.")
+    print(f"\n✅ Added {added} videos. Total: {len(library.videos)} videos in library.")
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 """Application runner script."""
+import importlib.util
+
 import uvicorn
 from app.config import config
 
@@ -7,11 +9,19 @@ if __name__ == "__main__":
     # Disable reload when using local VLM (model takes 1min to load)
     use_reload = config.debug and not config.video.use_local_vlm
     
+    # libuv event loop + C HTTP parser (both ship with uvicorn[standard] on Linux)
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+    
     uvicorn.run(
         "app.main:app",
         host=config.host,
         port=config.port,
         reload=use_reload,
+        loop=loop,
+        http=http,
+        # Protocol-level keepalive; dead progress sockets are dropped by uvicorn
+        ws_ping_interval=20.0,
+        ws_ping_timeout=20.0,
         log_level="info"
     )
-